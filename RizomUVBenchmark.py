@@ -0,0 +1,87 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+
+import RizomUVQuality
+from RizomUVLink import CRizomUVLink
+from RizomUVLinkPool import CRizomUVLinkPool
+from RizomUVPacking import ExpandMatrix, NestedParams, ReadReferenceMesh
+
+BENCHMARK_COLUMNS = ["Mesh", "Settings", "Version", "Seconds", "Coverage", "IslandCount", "ScaleUniformity"]
+
+# Default settings space of the command line: 6 runs per mesh. The full PACK_TUNING_SPACE
+# is meant for the autotuner and is too large for a benchmark of a whole corpus.
+BENCHMARK_SPACE = {
+    "Resolution": [None, 512, 1024],
+    "Rotate.Step": [0.0, 90.0],
+}
+
+def BenchmarkPack(link, meshPath : str, reference : dict, flatParams : dict) -> dict:
+    """ Packs a mesh once with the given settings and measures the layout
+
+        returns:
+            A result row, see BENCHMARK_COLUMNS.
+    """
+    link.Load({"File": {"Path": meshPath, "XYZUVW": True}})
+    start = time.perf_counter()
+    link.Pack({"Translate": True, "Global": NestedParams(flatParams)})
+    seconds = time.perf_counter() - start
+    row = {
+        "Mesh": os.path.basename(meshPath),
+        "Settings": ", ".join(key + "=" + str(value) for key, value in flatParams.items()),
+        "Version": link.RizomUVVersion(),
+        "Seconds": seconds,
+    }
+    row.update(RizomUVQuality.LayoutStats(dict(reference, **link.SaveData())))
+    return row
+
+def RunPackBenchmark(pool, meshPaths : list, matrix : list, repeats : int = 1) -> list:
+    """ Packs each mesh with each flat parameter set of matrix, repeats times, spreading the runs over the pool
+
+        returns:
+            The result rows in (mesh, settings, repeat) order.
+    """
+    references = dict(zip(meshPaths, pool.Map(ReadReferenceMesh, meshPaths)))
+    runs = [(meshPath, flatParams) for meshPath in meshPaths for flatParams in matrix for _ in range(repeats)]
+    return pool.Map(lambda link, run: BenchmarkPack(link, run[0], references[run[0]], run[1]), runs)
+
+def ReadMatrix(path : str) -> list:
+    """ Reads a settings matrix from a JSON file: either a {name: [values]} space or a list of flat parameter sets """
+    with open(path, "r") as f:
+        matrix = json.load(f)
+    return ExpandMatrix(matrix) if isinstance(matrix, dict) else matrix
+
+def WriteBenchmarkCSV(path : str, rows : list):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=BENCHMARK_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the Pack time and layout quality over a mesh corpus and a settings matrix")
+    parser.add_argument("corpus", help="folder of the meshes to pack (.obj, .fbx)")
+    parser.add_argument("output", help="path of the CSV result file")
+    parser.add_argument("--instances", type=int, default=None, help="number of RizomUV instances (default: CPU count)")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--matrix", default=None, help="JSON file of the settings to run, a {name: [values]} space or a list of flat parameter sets (default: BENCHMARK_SPACE)")
+    parser.add_argument("--exe", default=None, help="path of rizomuv.exe")
+    parser.add_argument("--standin", action="store_true", help="use in-process stand-in servers instead of RizomUV (OBJ corpus only)")
+    args = parser.parse_args()
+
+    linkClass = CRizomUVLink
+    if args.standin:
+        from RizomUVLinkStandIn import CRizomUVLinkStandIn
+        linkClass = CRizomUVLinkStandIn
+    matrix = ReadMatrix(args.matrix) if args.matrix else ExpandMatrix(BENCHMARK_SPACE)
+    meshPaths = sorted(glob.glob(os.path.join(args.corpus, "*.obj")) + glob.glob(os.path.join(args.corpus, "*.fbx")))
+
+    with CRizomUVLinkPool(args.instances, args.exe, linkClass) as pool:
+        rows = RunPackBenchmark(pool, meshPaths, matrix, args.repeats)
+    WriteBenchmarkCSV(args.output, rows)
+    print(str(len(rows)) + " runs written to " + args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import numpy as np
+
+from RizomUVLink import READ_ONLY_TASKS
+from RizomUVPacking import IslandUVBoxes
+
+class CRizomUVIslandIndex:
+    """ Client-side index of the islands of the mesh loaded in a RizomUV instance
+
+        Built from the IndexTable tables of the Save task, it answers island and polygon
+        queries locally. The index listens to the tasks sent by its link and is rebuilt
+        lazily, on the next query following a task that can change the mesh or its UVs.
+
+        Arrays:
+            polygonIslands  : island ID of each polygon
+            islandPolygons  : polygon IDs sorted by island, the polygons of island i are
+                              islandPolygons[islandStarts[i]:islandStarts[i + 1]]
+            islandStarts    : (islandCount + 1,) offsets into islandPolygons
+            vertexIslands   : island ID of each UVW vertex
+            boxes           : (islandCount, 4) UV bounding boxes [uMin, vMin, uMax, vMax]
+            areas           : UV space area of each island
+    """
+    def __init__(self, link):
+        self.link = link
+        self.stale = True
+        self.link.AddTaskListener(self.OnTask)
+
+    def OnTask(self, commandName, parameters, error):
+        if commandName not in READ_ONLY_TASKS:
+            self.stale = True
+
+    def Refresh(self):
+        """ Rebuilds the index from the current state of the instance """
+        return self.Build(self.link.SaveData())
+
+    def Build(self, data : dict):
+        """ Builds the index from CRizomUVLink.SaveData output """
+        self.polygonIslands = np.asarray(data["PolygonIDsToIslandIDs"], dtype=np.int64)
+        self.vertexIslands = np.asarray(data["VertexIDsToIslandIDs"], dtype=np.int64)
+        self.islandCount = int(self.polygonIslands.max()) + 1 if len(self.polygonIslands) else 0
+        self.islandPolygons = np.argsort(self.polygonIslands, kind="stable")
+        self.islandStarts = np.zeros(self.islandCount + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.polygonIslands, minlength=self.islandCount), out=self.islandStarts[1:])
+        self.boxes, self.areas = IslandUVBoxes(data)
+        self.stale = False
+        return self
+
+    def Update(self):
+        """ Refreshes the index if a mutating task was sent since the last refresh """
+        if self.stale:
+            self.Refresh()
+        return self
+
+    def PolygonsOf(self, islandIDs) -> np.ndarray:
+        """ Returns the polygon IDs of the given islands """
+        self.Update()
+        islandIDs = np.asarray(islandIDs, dtype=np.int64)
+        if not len(islandIDs):
+            return np.zeros(0, dtype=np.int64)
+        starts, ends = self.islandStarts[islandIDs], self.islandStarts[islandIDs + 1]
+        return np.concatenate([self.islandPolygons[start:end] for start, end in zip(starts.tolist(), ends.tolist())])
+
+    def IslandsOf(self, polygonIDs) -> np.ndarray:
+        """ Returns the sorted unique island IDs of the given polygons """
+        self.Update()
+        return np.unique(self.polygonIslands[np.asarray(polygonIDs, dtype=np.int64)])
+
+    def IslandsInBox(self, box) -> np.ndarray:
+        """ Returns the islands whose UV bounding box intersects box = [uMin, vMin, uMax, vMax] """
+        self.Update()
+        b = self.boxes
+        inside = (b[:, 0] <= box[2]) & (b[:, 2] >= box[0]) & (b[:, 1] <= box[3]) & (b[:, 3] >= box[1])
+        return np.flatnonzero(inside)
+
+    def SelectIslands(self, islandIDs, resetBefore : bool = True):
+        """ Selects all the polygons of the given islands with a single Select task """
+        self.link.Select({
+            "PrimType": "Polygon",
+            "List": True,
+            "IDs": self.PolygonsOf(islandIDs).tolist(),
+            "Select": True,
+            "ResetBefore": resetBefore,
+        })
+
+    def Close(self):
+        """ Stops listening to the tasks of the link """
+        self.link.RemoveTaskListener(self.OnTask)
@@ -21,17 +21,199 @@
 # SOFTWARE.
 
 import os
+import threading
+from contextlib import contextmanager
 
 # python 3.4+
 from pathlib import Path
 
 from RizomUVLinkBase import CRizomUVLinkBase
 from RizomUVLinkBase import CZEx
+from RizomUVLinkCancel import CCancelToken, CZCancelled
+from RizomUVLinkRetry import IsIdempotent
+from RizomUVLinkResults import CTaskResult, CZTaskEx, CheckReturnCode, TypedError, TimedCall
+
+# Tasks that change neither the mesh nor its UVs
+READ_ONLY_TASKS = {"PsExport", "RasterExport", "Save", "Count", "ItemNames", "Get", "GetAsString",
+                   "GenerateScriptingHelp", "Test", "LibTaskUpdate", "SavePreferences", "Select", "Hide"}
+
+# Tasks that don't add an entry to the undo history
+NOT_UNDOABLE_TASKS = {"PsExport", "RasterExport", "Save", "Count", "ItemNames", "Get", "GetAsString",
+                      "GenerateScriptingHelp", "Test", "LibTaskUpdate", "LibTaskEnd", "SavePreferences",
+                      "LoadPrefs", "InitLib", "Undo", "Redo", "Quit", "Exit"}
 
 class CRizomUVLink(CRizomUVLinkBase):
     def __init__(self):
         super().__init__()
+        self.InitState()
+
+    def InitState(self):
+        """ Initializes the members added by this class """
         self.port = None
+        self.process = None
+        self.taskStartListeners = []
+        self.taskListeners = [self.CountUndoStep]
+        self.transactions = []
+        self.undoHistorySize = None
+        self.cancelToken = None
+        self.abandoned = False
+        self.retryPolicy = None
+        # value returned by the last task, None if it failed, for the task listeners
+        self.lastResult = None
+
+    def Execute(self, commandName, parameters):
+        """ Runs a task, retrying it with retryPolicy when it is set and the task is idempotent """
+        if self.retryPolicy is None or not IsIdempotent(commandName, parameters):
+            return self.ExecuteOnce(commandName, parameters)
+        return self.retryPolicy.Call(lambda: self.ExecuteOnce(commandName, parameters))
+
+    def ExecuteOnce(self, commandName, parameters):
+        """ Runs a task, calling the task start listeners before and the task listeners after it
+
+            Documented error codes returned by the task and errors raised by the rizomuvlink
+            module are raised as CZTaskEx subclasses (see RizomUVLinkResults).
+        """
+        if self.abandoned:
+            raise CZEx("A cancelled task may still be running on this RizomUV instance, it must be restarted")
+        for listener in list(self.taskStartListeners):
+            listener(commandName, parameters)
+        self.lastResult = None
+        error = None
+        try:
+            if self.cancelToken is None:
+                value = super().Execute(commandName, parameters)
+            else:
+                value = self.ExecuteCancellable(commandName, parameters, self.cancelToken)
+            self.lastResult = CheckReturnCode(commandName, value)
+            return self.lastResult
+        except (CZTaskEx, CZCancelled) as e:
+            error = e
+            raise
+        except CZEx as e:
+            error = TypedError(commandName, e)
+            raise error from e
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            for listener in list(self.taskListeners):
+                listener(commandName, parameters, error)
+
+    def Run(self, commandName : str, parameters = {}) -> CTaskResult:
+        """ Runs a task by name
+
+            returns:
+                A CTaskResult with the returned value, the return code and the duration.
+        """
+        return TimedCall(commandName, self.Execute, commandName, parameters)
+
+    def ExecuteCancellable(self, commandName, parameters, cancelToken : CCancelToken):
+        """ Runs a task on a worker thread and stops waiting for it as soon as cancelToken is cancelled
+
+            RizomUV has no task to abort a running task, so after a cancellation the
+            instance is left busy and the link is marked as abandoned: its instance must
+            be restarted (CRizomUVLinkPool does it when the link is released).
+        """
+        cancelToken.Check()
+        wake = threading.Event()
+        outcome = {}
+
+        def run():
+            try:
+                outcome["Result"] = CRizomUVLinkBase.Execute(self, commandName, parameters)
+            except BaseException as error:
+                outcome["Error"] = error
+            wake.set()
+
+        cancelToken.AddCallback(wake.set)
+        try:
+            threading.Thread(target=run, daemon=True).start()
+            wake.wait()
+        finally:
+            cancelToken.RemoveCallback(wake.set)
+        if "Result" not in outcome and "Error" not in outcome:
+            self.abandoned = True
+            raise CZCancelled("Task " + commandName + " cancelled")
+        if "Error" in outcome:
+            raise outcome["Error"]
+        return outcome["Result"]
+
+    @contextmanager
+    def Cancellable(self, cancelToken : CCancelToken):
+        """ Makes the tasks sent inside a with block cancellable with cancelToken """
+        previous, self.cancelToken = self.cancelToken, cancelToken
+        try:
+            yield self
+        finally:
+            self.cancelToken = previous
+
+    def AddTaskListener(self, listener):
+        """ Registers listener(commandName, parameters, error), called after each task sent by this link
+
+            error is None when the task succeeded, otherwise the exception it raised.
+        """
+        self.taskListeners.append(listener)
+
+    def RemoveTaskListener(self, listener):
+        if listener in self.taskListeners:
+            self.taskListeners.remove(listener)
+
+    def AddTaskStartListener(self, listener):
+        """ Registers listener(commandName, parameters), called before each task sent by this link """
+        self.taskStartListeners.append(listener)
+
+    def RemoveTaskStartListener(self, listener):
+        if listener in self.taskStartListeners:
+            self.taskStartListeners.remove(listener)
+
+    def SetUndoHistorySize(self, size : int):
+        """ Limits the undo history of the instance
+
+            Batch sessions that never undo should use a small size so that the memory
+            of long running instances doesn't grow with the task count.
+        """
+        self.InitLib({"UndoHistorySize": size})
+        self.undoHistorySize = size
+
+    @contextmanager
+    def Transaction(self):
+        """ Groups the tasks sent inside a with block
+
+            If the block raises an exception, the tasks that succeeded since the start of
+            the transaction are rolled back with Undo before the exception is propagated.
+            Transactions can be nested: a rolled back inner transaction is not undone
+            again by the outer one.
+
+            The rollback needs an undo history at least as long as the transaction, a
+            CZEx is raised if SetUndoHistorySize made it shorter.
+        """
+        steps = [0]
+        self.transactions.append(steps)
+        try:
+            yield self
+        except BaseException as error:
+            self.transactions.remove(steps)
+            # an abandoned instance is restarted, there is nothing to roll back
+            if not self.abandoned:
+                self.Rollback(steps[0], error)
+            raise
+        finally:
+            if steps in self.transactions:
+                self.transactions.remove(steps)
+
+    def Rollback(self, stepCount : int, error : BaseException = None):
+        undoable = stepCount if self.undoHistorySize is None else min(stepCount, self.undoHistorySize)
+        for i in range(undoable):
+            self.Undo({})
+        for steps in self.transactions:
+            steps[0] = max(0, steps[0] - undoable)
+        if undoable < stepCount:
+            raise CZEx("Only " + str(undoable) + " of the " + str(stepCount) + " tasks of the transaction could be undone, the undo history is too short") from error
+
+    def CountUndoStep(self, commandName, parameters, error):
+        if error is None and commandName not in NOT_UNDOABLE_TASKS:
+            for steps in self.transactions:
+                steps[0] += 1
 
     def RunRizomUV(self, exePath : str = None, port : int = None, connect : bool = True, wait : bool = True) -> int:
         """ Runs RizomUV, connect to the instance and wait for it to be ready
@@ -52,13 +234,7 @@ class CRizomUVLink(CRizomUVLinkBase):
 
         # define the TCP port used for communication
         if port == None:
-            # search a free TCP port on the dynamic range
-            for p in range(49152, 65534):
-                if not self.TCPPortIsOpen(p):
-                    self.port = p
-                    break
-                if p == 65533:
-                    raise CZEx("No available TCP Port found. This shouldn't be the case. Might worth to check your firewall settings just in case.")
+            self.port = self.FindFreePort()
         else:
             if self.TCPPortIsOpen(port):
                 raise CZEx("Port " + str(port) + " is already in use, please connect using another port")
@@ -69,7 +245,7 @@ class CRizomUVLink(CRizomUVLinkBase):
 
         # run RizomUV asynchronously
         import subprocess
-        subprocess.Popen(exePath + " -id " + str(self.port))
+        self.process = subprocess.Popen(exePath + " -id " + str(self.port))
 
         # connect the the instance
         if connect:
@@ -81,7 +257,61 @@ class CRizomUVLink(CRizomUVLinkBase):
             version = self.RizomUVVersion()
 
         return self.port
-        
+
+    def FindFreePort(self, exclude = ()) -> int:
+        """ Returns the first TCP port of the dynamic range that is not open
+
+            exclude:
+                Ports to skip even if they are not open yet, for instance the ports
+                given to instances that have been ran but are still initializing.
+        """
+        # search a free TCP port on the dynamic range
+        for p in range(49152, 65534):
+            if p not in exclude and not self.TCPPortIsOpen(p):
+                return p
+        raise CZEx("No available TCP Port found. This shouldn't be the case. Might worth to check your firewall settings just in case.")
+
+    def Close(self, timeout : float = 5.0):
+        """ Quits the RizomUV instance ran by RunRizomUV
+
+            The instance is killed if it doesn't exit within the given timeout in seconds.
+        """
+        if self.process is None:
+            return
+        try:
+            self.Quit({})
+        except CZEx:
+            # the instance may already be shutting down
+            pass
+        import subprocess
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.process = None
+
+    def Kill(self):
+        """ Kills the RizomUV instance ran by RunRizomUV without waiting for it to quit """
+        if self.process is not None:
+            self.process.kill()
+            self.process = None
+
+    def SaveData(self, indexTables : bool = True) -> dict:
+        """ Exports the current UVW data using the Save task "Data" mode
+
+            returns:
+                A flat dictionary with the "PolySizes", "PolyUVWIDs" and "CoordsUVW" lists and,
+                when indexTables is True, the "VertexIDsToIslandIDs" and "PolygonIDsToIslandIDs"
+                index tables.
+        """
+        params = {"Data": {}}
+        if indexTables:
+            params["IndexTable"] = {"VertexIDsToIslandIDs": True, "PolygonIDsToIslandIDs": True}
+        result = self.Save(params)
+        data = dict(result.get("Data", {}))
+        data.update(result.get("IndexTable", {}))
+        return data
+
     def RizomUVPath(self) -> str:
         import platform
         if platform.system() == "Windows":
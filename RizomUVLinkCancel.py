@@ -0,0 +1,48 @@
+import threading
+
+from RizomUVLinkBase import CZEx
+
+class CZCancelled(CZEx):
+    """ Raised by a task call whose cancel token has been cancelled """
+    pass
+
+class CCancelToken:
+    """ Cancellation flag shared between the code running tasks and the code cancelling them
+
+        Give it to CRizomUVLink.Cancellable (or CRizomUVLinkPool.Session): a task running
+        when Cancel is called stops being waited for immediately and raises CZCancelled.
+    """
+    def __init__(self):
+        self.event = threading.Event()
+        self.callbacks = []
+        self.lock = threading.Lock()
+
+    def Cancel(self):
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def IsCancelled(self) -> bool:
+        return self.event.is_set()
+
+    def Check(self):
+        """ Raises CZCancelled if the token has been cancelled """
+        if self.event.is_set():
+            raise CZCancelled("Cancelled")
+
+    def AddCallback(self, callback):
+        """ Calls callback() when the token is cancelled, immediately if it already is """
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return
+        callback()
+
+    def RemoveCallback(self, callback):
+        with self.lock:
+            if callback in self.callbacks:
+                self.callbacks.remove(callback)
@@ -0,0 +1,211 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Task latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0)
+
+def LabelText(labels : tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"' for name, value in labels) + "}"
+
+def PayloadBytes(value) -> int:
+    """ Estimated size of a task parameter or result on the wire
+
+        Counts 8 bytes per number and the length of strings without serializing, so
+        large "Data" lists cost one len() call.
+    """
+    if isinstance(value, dict):
+        return sum(len(key) + PayloadBytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (int, float)):
+            return 8 * len(value)
+        return sum(PayloadBytes(item) for item in value)
+    if isinstance(value, str):
+        return len(value)
+    return 0 if value is None else 8
+
+class CMetric:
+    """ Base class of the metrics: a name, a help text and values per label set
+
+        If function is given, the unlabelled value is read from function() each time
+        the metric is rendered, so sampling costs nothing between two scrapes.
+    """
+    type = "untyped"
+
+    def __init__(self, name : str, help : str, function = None):
+        self.name = name
+        self.help = help
+        self.function = function
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def Render(self) -> list:
+        if self.function is not None:
+            with self.lock:
+                self.values[()] = self.function()
+        lines = ["# HELP " + self.name + " " + self.help, "# TYPE " + self.name + " " + self.type]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(self.name + LabelText(labels) + " " + repr(float(value)))
+        return lines
+
+class CCounter(CMetric):
+    type = "counter"
+
+    def Inc(self, amount : float = 1.0, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+class CGauge(CMetric):
+    type = "gauge"
+
+    def Set(self, value : float, **labels):
+        with self.lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+class CHistogram(CMetric):
+    type = "histogram"
+
+    def __init__(self, name : str, help : str, buckets : tuple = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(buckets)
+
+    def Observe(self, value : float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # bucket counts, then the +Inf count and the sum
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def Render(self) -> list:
+        lines = ["# HELP " + self.name + " " + self.help, "# TYPE " + self.name + " histogram"]
+        with self.lock:
+            for labels, counts in sorted(self.values.items()):
+                cumulated = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts[:-1]):
+                    cumulated += count
+                    lines.append(self.name + "_bucket" + LabelText(labels + (("le", bound),)) + " " + str(cumulated))
+                lines.append(self.name + "_sum" + LabelText(labels) + " " + repr(float(counts[-1])))
+                lines.append(self.name + "_count" + LabelText(labels) + " " + str(cumulated))
+        return lines
+
+class CMetricsRegistry:
+    """ Metrics of the links and pools of a process, rendered in the Prometheus text format
+
+        Recording a task costs two dictionary updates under a lock, payload sizes are
+        estimated without serializing (see PayloadBytes).
+    """
+    def __init__(self, prefix : str = "rizomuv_"):
+        self.prefix = prefix
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.tasks = self.Histogram("task_seconds", "Duration of the tasks sent to RizomUV instances")
+        self.errors = self.Counter("task_errors_total", "Failed tasks by error class")
+        self.bytesSent = self.Counter("bytes_sent_total", "Estimated size of the task parameters sent")
+        self.bytesReceived = self.Counter("bytes_received_total", "Estimated size of the task results received")
+
+    def Add(self, metric : CMetric) -> CMetric:
+        """ Registers a metric, raising a ValueError when its name is already taken """
+        metric.name = self.prefix + metric.name
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError("Metric already registered: " + metric.name)
+            self.metrics[metric.name] = metric
+        return metric
+
+    def Counter(self, name : str, help : str, function = None) -> CCounter:
+        return self.Add(CCounter(name, help, function))
+
+    def Gauge(self, name : str, help : str, function = None) -> CGauge:
+        return self.Add(CGauge(name, help, function))
+
+    def Histogram(self, name : str, help : str, buckets : tuple = LATENCY_BUCKETS) -> CHistogram:
+        return self.Add(CHistogram(name, help, buckets))
+
+    def InstrumentLink(self, link, name : str = None):
+        """ Records the tasks of a link: latency, errors and payload sizes, labelled by task and instance """
+        instance = name or str(link.port)
+        starts = {}
+
+        def onStart(commandName, parameters):
+            starts[commandName] = time.perf_counter()
+            self.bytesSent.Inc(PayloadBytes(parameters), instance=instance)
+
+        def onEnd(commandName, parameters, error):
+            start = starts.pop(commandName, None)
+            if start is not None:
+                self.tasks.Observe(time.perf_counter() - start, task=commandName)
+            if error is not None:
+                self.errors.Inc(task=commandName, error=type(error).__name__)
+            else:
+                self.bytesReceived.Inc(PayloadBytes(link.lastResult), instance=instance)
+
+        link.AddTaskStartListener(onStart)
+        link.AddTaskListener(onEnd)
+
+    def InstrumentPool(self, pool, name : str = "pool"):
+        """ Adds the gauges of a CRizomUVLinkPool and instruments its current and future links
+
+            Each pool of a registry needs its own name, the metric names start with it.
+        """
+        self.Gauge(name + "_instances", "Instances of the pool", lambda: len(pool.links))
+        self.Gauge(name + "_idle_instances", "Idle instances of the pool", lambda: pool.idle.qsize())
+        self.Gauge(name + "_busy_instances", "Busy instances of the pool", lambda: len(pool.links) - pool.idle.qsize())
+        self.Gauge(name + "_waiting", "Threads waiting for an instance of the pool", lambda: pool.waiting)
+        self.Counter(name + "_restarts_total", "Instances restarted by the pool", lambda: pool.restartCount)
+        self.Counter(name + "_spawn_errors_total", "Instances of the pool that failed to start", lambda: pool.spawnErrorCount)
+        for link in list(pool.links):
+            self.InstrumentLink(link)
+        pool.spawnListeners.append(self.InstrumentLink)
+
+    def InstrumentScheduler(self, scheduler, name : str = "scheduler"):
+        self.Gauge(name + "_queue_depth", "Jobs waiting in the scheduler", lambda: len(scheduler.pending))
+        self.Gauge(name + "_running", "Jobs running in the scheduler", lambda: len(scheduler.running))
+
+    def Render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.Render())
+        return "\n".join(lines) + "\n"
+
+    def WriteFile(self, path : str):
+        """ Writes the metrics into a file atomically, for instance for the node exporter textfile collector """
+        temporaryPath = path + ".tmp"
+        with open(temporaryPath, "w") as f:
+            f.write(self.Render())
+        os.replace(temporaryPath, path)
+
+class CMetricsServer:
+    """ Serves the metrics of a registry over HTTP (any path, usually /metrics) from a daemon thread """
+    def __init__(self, registry : CMetricsRegistry, port : int = 9464, host : str = "127.0.0.1"):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                body = registry.Render().encode("utf-8")
+                handler.send_response(200)
+                handler.send_header("Content-Type", "text/plain; version=0.0.4")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def Close(self):
+        self.server.shutdown()
+        self.server.server_close()
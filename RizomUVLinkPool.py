@@ -0,0 +1,214 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from RizomUVLink import CRizomUVLink
+from RizomUVLinkBase import CZEx
+from RizomUVLinkCancel import CCancelToken
+
+# Delays between the attempts to restart a recycled instance that failed to start
+RESPAWN_RETRY_SECONDS = 1.0
+RESPAWN_RETRY_MAX_SECONDS = 30.0
+
+class CRizomUVLinkPool:
+    """ A fixed size pool of RizomUV standalone instances
+
+        Each instance runs in its own process on its own TCP port, so tasks sent to
+        distinct links of the pool run in parallel. A link must be used by a single
+        thread at a time: take it with Acquire (or the Session context manager) and
+        give it back with Release.
+
+        Instances keep their state between sessions, so jobs are expected to start
+        with a Load task. When undoHistorySize is given, it is applied to each instance
+        (see CRizomUVLink.SetUndoHistorySize) to keep the memory of long running
+        instances flat.
+    """
+    def __init__(self, size : int = None, exePath : str = None, linkClass = CRizomUVLink, undoHistorySize : int = None):
+        self.size = size if size else (os.cpu_count() or 1)
+        self.exePath = exePath
+        self.linkClass = linkClass
+        self.undoHistorySize = undoHistorySize
+        self.links = []
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        # held while Start runs, so that concurrent first Acquire calls start the instances once
+        self.startLock = threading.Lock()
+        # ports chosen by Spawn whose instance is not listening yet
+        self.reservedPorts = set()
+        # count of threads waiting in Acquire and of instances restarted by Recycle
+        self.waiting = 0
+        self.restartCount = 0
+        # count of recycled instances whose replacement is not running yet
+        self.restarting = 0
+        # called with each new link once its instance is running
+        self.spawnListeners = []
+        # count and last error of the instances that failed to start, listeners called with each error
+        self.spawnErrorCount = 0
+        self.lastSpawnError = None
+        self.spawnErrorListeners = []
+        self.closed = False
+
+    def Start(self):
+        """ Runs the instances of the pool and waits for all of them to be ready """
+        with self.startLock:
+            self.closed = False
+            while len(self.links) + self.restarting < self.size:
+                self.idle.put(self.Spawn())
+        return self
+
+    def Spawn(self, replacing : bool = False) -> CRizomUVLink:
+        """ Runs a new RizomUV instance and adds its link to the pool (not to the idle queue)
+
+            replacing:
+                True when the instance replaces one killed by Recycle, it then counts as
+                live again (see LiveCount) once it runs.
+        """
+        link = self.linkClass()
+        with self.lock:
+            # the port of a link is only set by RunRizomUV, so concurrent spawns also skip the reserved ones
+            port = link.FindFreePort(exclude={other.port for other in self.links} | self.reservedPorts)
+            self.reservedPorts.add(port)
+            self.links.append(link)
+        try:
+            try:
+                link.RunRizomUV(self.exePath, port)
+            finally:
+                with self.lock:
+                    self.reservedPorts.discard(port)
+            if self.undoHistorySize is not None:
+                link.SetUndoHistorySize(self.undoHistorySize)
+        except BaseException as e:
+            # the link is dropped so that the pool does not count or close a dead instance
+            with self.lock:
+                if link in self.links:
+                    self.links.remove(link)
+                self.spawnErrorCount += 1
+                self.lastSpawnError = e
+            link.Kill()
+            for listener in list(self.spawnErrorListeners):
+                listener(e)
+            raise
+        if replacing:
+            with self.lock:
+                self.restarting -= 1
+        for listener in list(self.spawnListeners):
+            listener(link)
+        return link
+
+    def LiveCount(self) -> int:
+        """ Count of instances of the pool that are running or about to be started by Acquire, leaving out the ones being restarted """
+        with self.lock:
+            return self.size - self.restarting
+
+    def Acquire(self, timeout : float = None) -> CRizomUVLink:
+        """ Returns an idle link, waiting for one to be released if needed """
+        if not self.links and not self.restarting:
+            self.Start()
+        with self.lock:
+            self.waiting += 1
+        try:
+            return self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise CZEx("No RizomUV instance available in the pool after " + str(timeout) + " seconds")
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def Release(self, link : CRizomUVLink):
+        """ Gives a link back to the pool, restarting its instance if a task was cancelled on it
+
+            A link released after Close (by a job still running then) is not part of the
+            pool anymore: its instance is quit instead.
+        """
+        with self.lock:
+            inPool = not self.closed and link in self.links
+            if inPool and not link.abandoned:
+                # under the lock so that Close cannot replace the idle queue meanwhile
+                self.idle.put(link)
+                return
+        if inPool:
+            self.Recycle(link)
+        else:
+            link.Close()
+
+    def Recycle(self, link : CRizomUVLink):
+        """ Kills the instance of a link and replaces it with a new one, in the background
+
+            When the new instance fails to start, the error is recorded (spawnErrorCount,
+            lastSpawnError, spawnErrorListeners) and the start is retried with a growing
+            delay until it succeeds or the pool is closed, so the pool keeps its size.
+        """
+        def restart():
+            link.Kill()
+            with self.lock:
+                if link not in self.links:
+                    # the pool has been closed meanwhile
+                    self.restarting -= 1
+                    return
+                self.links.remove(link)
+                self.restartCount += 1
+            delay = RESPAWN_RETRY_SECONDS
+            while not self.closed:
+                try:
+                    self.idle.put(self.Spawn(replacing=True))
+                    return
+                except Exception:
+                    time.sleep(delay)
+                    delay = min(2 * delay, RESPAWN_RETRY_MAX_SECONDS)
+            with self.lock:
+                self.restarting -= 1
+
+        with self.lock:
+            self.restarting += 1
+
+        threading.Thread(target=restart, daemon=True).start()
+
+    @contextmanager
+    def Session(self, timeout : float = None, cancelToken : CCancelToken = None):
+        """ Acquires a link for the duration of a with block
+
+            If cancelToken is given, the tasks sent in the block can be cancelled with it;
+            the instance is then restarted before going back to the pool.
+        """
+        link = self.Acquire(timeout)
+        try:
+            if cancelToken is None:
+                yield link
+            else:
+                with link.Cancellable(cancelToken):
+                    yield link
+        finally:
+            self.Release(link)
+
+    def Map(self, function, items) -> list:
+        """ Calls function(link, item) for each item, spreading the calls over the pool instances
+
+            returns:
+                The results in the order of the items. The first exception raised by a call
+                is re-raised once all calls are done.
+        """
+        def run(item):
+            with self.Session() as link:
+                return function(link, item)
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(run, item) for item in items]
+        return [future.result() for future in futures]
+
+    def Close(self):
+        """ Quits all the instances of the pool """
+        with self.lock:
+            self.closed = True
+            links, self.links = self.links, []
+            self.idle = queue.Queue()
+        for link in links:
+            link.Close()
+
+    def __enter__(self):
+        return self.Start()
+
+    def __exit__(self, excType, excValue, traceback):
+        self.Close()
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from RizomUVLinkBase import CZEx
+
+def ParseTaskUpdate(result) -> float:
+    """ Extracts a 0 to 1 progress value from a LibTaskUpdate answer, None if it has none
+
+        LibTaskUpdate is an internal task whose answer is not documented, numbers
+        (ratios or percentages) and tables with a "Progress" or "Percent" member are
+        accepted.
+    """
+    if isinstance(result, dict):
+        result = result.get("Progress", result.get("Percent"))
+    if isinstance(result, bool) or not isinstance(result, (int, float)):
+        return None
+    value = float(result)
+    if value > 1.0:
+        value /= 100.0
+    return min(max(value, 0.0), 1.0)
+
+class CRizomUVTaskProbe:
+    """ Reads the progress of the running task with LibTaskUpdate on a second connection to the instance
+
+        The first connection is blocked until the task returns, so the probe needs its
+        own, released by Close. If the instance doesn't answer while busy, the probe
+        returns None and the monitor falls back to duration based estimates.
+    """
+    def __init__(self, link):
+        self.link = link
+        self.probeLink = None
+
+    def __call__(self) -> float:
+        try:
+            if self.probeLink is None:
+                self.probeLink = type(self.link)()
+                self.probeLink.Connect(self.link.port)
+            return ParseTaskUpdate(self.probeLink.LibTaskUpdate({}))
+        except CZEx:
+            return None
+
+    def Close(self):
+        """ Drops the second connection, the native connection object closes its socket when destroyed """
+        self.probeLink = None
+
+class CRizomUVProgressMonitor:
+    """ Reports the progress of the tasks sent by a link while they run
+
+        Subscribers are called from the monitor thread with an event dictionary:
+            "Task"      : task name
+            "State"     : "Started", "Running", "Stalled", "Done" or "Failed"
+            "Elapsed"   : seconds since the task started
+            "Progress"  : 0 to 1, None when unknown
+            "ETA"       : estimated remaining seconds, None when unknown
+
+        The progress comes from probe() (a CRizomUVTaskProbe by default). When it is
+        unknown, the ETA is estimated from the average duration of the previous runs
+        of the same task. A task is reported "Stalled" once, when its progress didn't
+        change for stallSeconds or when it runs stallFactor times longer than usual.
+    """
+    def __init__(self, link, probe = None, interval : float = 0.5, stallSeconds : float = 30.0, stallFactor : float = 3.0, tasks : set = None):
+        self.link = link
+        self.probe = probe if probe is not None else CRizomUVTaskProbe(link)
+        self.interval = interval
+        self.stallSeconds = stallSeconds
+        self.stallFactor = stallFactor
+        self.tasks = tasks
+        self.durations = {}
+        self.subscribers = []
+        self.current = None
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.Run, daemon=True)
+        self.thread.start()
+        link.AddTaskStartListener(self.OnTaskStart)
+        link.AddTaskListener(self.OnTaskEnd)
+
+    def Subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def Unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def ExpectedSeconds(self, commandName : str) -> float:
+        """ Average duration of the previous runs of a task, None if it never ran """
+        return self.durations.get(commandName)
+
+    def OnTaskStart(self, commandName, parameters):
+        if self.tasks is not None and commandName not in self.tasks:
+            return
+        now = time.perf_counter()
+        with self.condition:
+            self.current = {"Task": commandName, "Start": now, "Progress": None, "Changed": now, "Stalled": False}
+            self.condition.notify_all()
+        self.Emit(commandName, "Started", 0.0, None)
+
+    def OnTaskEnd(self, commandName, parameters, error):
+        with self.condition:
+            current, self.current = self.current, None
+            self.condition.notify_all()
+        if current is None or current["Task"] != commandName:
+            return
+        elapsed = time.perf_counter() - current["Start"]
+        if error is None:
+            previous = self.durations.get(commandName)
+            self.durations[commandName] = elapsed if previous is None else 0.7 * previous + 0.3 * elapsed
+        self.Emit(commandName, "Done" if error is None else "Failed", elapsed, 1.0 if error is None else current["Progress"])
+
+    def Run(self):
+        while True:
+            with self.condition:
+                while self.current is None and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                current = self.current
+                self.condition.wait(self.interval)
+                if self.current is not current:
+                    continue
+            self.Poll(current)
+
+    def Poll(self, current : dict):
+        progress = self.probe()
+        now = time.perf_counter()
+        elapsed = now - current["Start"]
+        if progress is not None and progress != current["Progress"]:
+            current["Progress"], current["Changed"] = progress, now
+        progress = current["Progress"]
+        expected = self.durations.get(current["Task"])
+        if progress is not None and progress > 0.0:
+            eta = elapsed * (1.0 - progress) / progress
+        elif expected is not None:
+            eta = max(0.0, expected - elapsed)
+        else:
+            eta = None
+
+        if self.current is not current:
+            return
+        stalled = now - current["Changed"] > self.stallSeconds if progress is not None else \
+            expected is not None and elapsed > self.stallFactor * expected
+        if stalled and not current["Stalled"]:
+            current["Stalled"] = True
+            self.Emit(current["Task"], "Stalled", elapsed, progress, eta)
+        else:
+            self.Emit(current["Task"], "Running", elapsed, progress, eta)
+
+    def Emit(self, commandName, state, elapsed, progress, eta = None):
+        event = {"Task": commandName, "State": state, "Elapsed": elapsed, "Progress": progress, "ETA": eta}
+        for callback in list(self.subscribers):
+            callback(event)
+
+    def Close(self):
+        """ Stops monitoring the link """
+        self.link.RemoveTaskStartListener(self.OnTaskStart)
+        self.link.RemoveTaskListener(self.OnTaskEnd)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        # the probe may be any callable, only CRizomUVTaskProbe-like ones hold a connection
+        close = getattr(self.probe, "Close", None)
+        if close is not None:
+            close()
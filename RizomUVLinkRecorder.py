@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from RizomUVLink import CRizomUVLink
+
+# Lists of numbers longer than this are stored in .npy files next to the session file
+OUT_OF_LINE_THRESHOLD = 256
+SESSION_FILE = "session.jsonl"
+
+class CRizomUVSessionRecorder:
+    """ Records the tasks sent by a link into a session folder
+
+        Each call is appended to <folder>/session.jsonl as soon as it returns (task name,
+        parameters, result, duration and error), so the session survives a crash of the
+        recording process. Long number lists (mesh "Data" members) are stored out of
+        line in <folder>/arrays/*.npy.
+
+        A session can be replayed with ReplaySession to compare the task timings of two
+        runs, for instance to turn a slow production job into a benchmark.
+    """
+    def __init__(self, link, folder : str, recordResults : bool = True):
+        self.link = link
+        self.folder = folder
+        self.recordResults = recordResults
+        self.index = 0
+        self.arrayCount = 0
+        self.starts = {}
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(folder, "arrays"), exist_ok=True)
+        self.file = open(os.path.join(folder, SESSION_FILE), "a")
+        link.AddTaskStartListener(self.OnTaskStart)
+        link.AddTaskListener(self.OnTaskEnd)
+
+    def OnTaskStart(self, commandName, parameters):
+        self.starts[commandName] = time.perf_counter()
+
+    def OnTaskEnd(self, commandName, parameters, error):
+        seconds = time.perf_counter() - self.starts.pop(commandName, time.perf_counter())
+        with self.lock:
+            call = {
+                "Index": self.index,
+                "Task": commandName,
+                "Params": self.Encode(parameters),
+                "Seconds": seconds,
+                "Error": None if error is None else type(error).__name__ + ": " + str(error),
+            }
+            if self.recordResults and error is None:
+                call["Result"] = self.Encode(self.link.lastResult)
+            self.file.write(json.dumps(call) + "\n")
+            self.file.flush()
+            self.index += 1
+
+    def Encode(self, value):
+        """ Replaces the long number lists of value by references to .npy files """
+        if isinstance(value, dict):
+            return {key: self.Encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            if len(value) > OUT_OF_LINE_THRESHOLD and isinstance(value[0], (int, float)):
+                name = "arrays/%06d.npy" % self.arrayCount
+                self.arrayCount += 1
+                np.save(os.path.join(self.folder, name), np.asarray(value))
+                return {"$array": name}
+            return [self.Encode(item) for item in value]
+        return value
+
+    def Close(self):
+        self.link.RemoveTaskStartListener(self.OnTaskStart)
+        self.link.RemoveTaskListener(self.OnTaskEnd)
+        self.file.close()
+
+def DecodeValue(folder : str, value):
+    """ Loads back the lists stored out of line by CRizomUVSessionRecorder """
+    if isinstance(value, dict):
+        if "$array" in value:
+            return np.load(os.path.join(folder, value["$array"])).tolist()
+        return {key: DecodeValue(folder, item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [DecodeValue(folder, item) for item in value]
+    return value
+
+def ReadSession(folder : str) -> list:
+    with open(os.path.join(folder, SESSION_FILE), "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def ReplaySession(folder : str, link) -> list:
+    """ Sends the recorded tasks of a session again, in order
+
+        Failures are recorded and the replay goes on, like the recorded session did.
+
+        returns:
+            One row per call: "Index", "Task", "Recorded" and "Replayed" seconds, "Delta"
+            (replayed minus recorded), "RecordedError" and "Error".
+    """
+    rows = []
+    for call in ReadSession(folder):
+        params = DecodeValue(folder, call["Params"])
+        error = None
+        start = time.perf_counter()
+        try:
+            link.Execute(call["Task"], params)
+        except Exception as e:
+            error = type(e).__name__ + ": " + str(e)
+        seconds = time.perf_counter() - start
+        rows.append({
+            "Index": call["Index"],
+            "Task": call["Task"],
+            "Recorded": call["Seconds"],
+            "Replayed": seconds,
+            "Delta": seconds - call["Seconds"],
+            "RecordedError": call["Error"],
+            "Error": error,
+        })
+    return rows
+
+def SummarizeReplay(rows : list) -> dict:
+    """ Per task totals of a replay: {task: {"Count", "Recorded", "Replayed", "Delta", "Ratio"}} """
+    summary = {}
+    for row in rows:
+        entry = summary.setdefault(row["Task"], {"Count": 0, "Recorded": 0.0, "Replayed": 0.0})
+        entry["Count"] += 1
+        entry["Recorded"] += row["Recorded"]
+        entry["Replayed"] += row["Replayed"]
+    for entry in summary.values():
+        entry["Delta"] = entry["Replayed"] - entry["Recorded"]
+        entry["Ratio"] = entry["Replayed"] / entry["Recorded"] if entry["Recorded"] > 0 else None
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a recorded RizomUV session and reports the timing deltas per task")
+    parser.add_argument("session", help="session folder written by CRizomUVSessionRecorder")
+    parser.add_argument("--exe", default=None, help="path of rizomuv.exe")
+    parser.add_argument("--standin", action="store_true", help="replay on an in-process stand-in server")
+    args = parser.parse_args()
+
+    if args.standin:
+        from RizomUVLinkStandIn import CRizomUVLinkStandIn
+        link = CRizomUVLinkStandIn()
+    else:
+        link = CRizomUVLink()
+    link.RunRizomUV(args.exe)
+    try:
+        rows = ReplaySession(args.session, link)
+    finally:
+        link.Close()
+
+    for row in rows:
+        if row["Error"] != row["RecordedError"]:
+            print("#" + str(row["Index"]) + " " + row["Task"] + ": " + str(row["RecordedError"]) + " -> " + str(row["Error"]))
+    print("%-24s %6s %12s %12s %12s %8s" % ("Task", "Count", "Recorded", "Replayed", "Delta", "Ratio"))
+    for task, entry in sorted(SummarizeReplay(rows).items(), key=lambda item: -abs(item[1]["Delta"])):
+        ratio = "%.2f" % entry["Ratio"] if entry["Ratio"] is not None else "-"
+        print("%-24s %6d %12.3f %12.3f %+12.3f %8s" % (task, entry["Count"], entry["Recorded"], entry["Replayed"], entry["Delta"], ratio))
+
+if __name__ == '__main__':
+    main()
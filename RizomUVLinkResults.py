@@ -0,0 +1,123 @@
+import time
+
+from RizomUVLinkBase import CZEx
+
+class CZTaskEx(CZEx):
+    """ Base class of the task errors raised by CRizomUVLink
+
+        members:
+            task    : name of the failed task
+            code    : documented return code (for instance "IMPORT_TASK_FILE_NOT_FOUND"), None if there is none
+    """
+    def __init__(self, message : str, task : str = None, code : str = None):
+        super().__init__(message)
+        self.task = task
+        self.code = code
+
+class CZTransportEx(CZTaskEx):
+    """ The instance didn't answer: not started yet, restarting, busy or gone. Safe to retry on idempotent tasks """
+    pass
+
+class CZInputEx(CZTaskEx):
+    """ The task rejected its input (missing file, malformed data, bad parameter). Retrying won't help """
+    pass
+
+class CZResourceEx(CZTaskEx):
+    """ The instance lacks a resource (memory, file access, FBX SDK). May succeed on another machine """
+    pass
+
+class CZTaskFailedEx(CZTaskEx):
+    """ The task failed without a more specific reason """
+    pass
+
+SUCCESS_CODES = {"IMPORT_TASK_SUCCES", "EXPORT_TASK_SUCCES"}
+
+# Documented Load and Save codes that only warn, the task succeeded
+WARNING_CODES = {
+    "IMPORT_TASK_WARNING_UVW_COUNT_LESS_THAN_3D_COUNT",
+    "IMPORT_TASK_WARNING_RIZOMUV_METADATA_FAILED_TO_LOAD",
+}
+
+ERROR_CODES = {
+    "IMPORT_TASK_FILE_NOT_FOUND": CZInputEx,
+    "IMPORT_TASK_BAD_VERTEX_ID_POLY_V3D_LIST": CZInputEx,
+    "IMPORT_TASK_BAD_VERTEX_ID_POLY_VT_LIST": CZInputEx,
+    "IMPORT_TASK_BAD_VERTEX_ID_POLY_VN_LIST": CZInputEx,
+    "IMPORT_TASK_MISFORMED_POLYGON_LISTS": CZInputEx,
+    "IMPORT_TASK_TOPO_ERROR": CZInputEx,
+    "IMPORT_TASK_FILE_CONTAINS_INCONSISTANT_DATA": CZInputEx,
+    "IMPORT_TASK_FILE_IS_PASSWD_PROTECTED": CZInputEx,
+    "IMPORT_TASK_FILE_HAS_NOT_THE_EXPECTED_FILE_FORMAT": CZInputEx,
+    "IMPORT_TASK_FILE_FORMAT_VERSION_IS_NOT_HANDLED": CZInputEx,
+    "IMPORT_TASK_FILE_OBJECT_CONTAINS_UNSUPORTED_CHARACTER": CZInputEx,
+    "IMPORT_TASK_DATA_NOT_FOUND": CZInputEx,
+    "IMPORT_TASK_UV_SET_HAS_EMPTY_NAME": CZInputEx,
+    "IMPORT_TASK_OBJECTS_HAVE_INCONSISTANT_UV_SETS": CZInputEx,
+    "IMPORT_TASK_UNSUPPORTED_OMNIVERSE_FORMAT": CZInputEx,
+    "IMPORT_TASK_FBX_SDK_NOT_PRESENT": CZResourceEx,
+    "IMPORT_TASK_FAILURE": CZTaskFailedEx,
+    "EXPORT_TASK_MISFORMED_FILE_PATH": CZInputEx,
+    "EXPORT_TASK_UNKNOWN_FILE_EXTENTION": CZInputEx,
+    "EXPORT_TASK_IMPOSED_UVW_POLYGON_HAS_INCORRECT_SIZE": CZInputEx,
+    "EXPORT_TASK_IMPOSED_UVW_POLYGON_LIST_HAS_INCORRECT_SIZE": CZInputEx,
+    "EXPORT_TASK_IMPOSED_UVW_LIST_HAS_INCORRECT_SIZE": CZInputEx,
+    "EXPORT_TASK_INVALID_FILE_VERSION": CZInputEx,
+    "EXPORT_TASK_INVALID_PARAMETER": CZInputEx,
+    "EXPORT_TASK_INVALID_FILE": CZInputEx,
+    "EXPORT_TASK_INDEX_OUT_OF_RANGE": CZInputEx,
+    "EXPORT_TASK_PASSWORD_ERROR": CZInputEx,
+    "EXPORT_TASK_UNSUPPORTED_OMNIVERSE_FORMAT": CZInputEx,
+    "EXPORT_TASK_FAILED_TO_OPEN_FILE_FOR_WRITING": CZResourceEx,
+    "EXPORT_TASK_INSUFFICIENT_MEMORY": CZResourceEx,
+    "EXPORT_TASK_FBX_SDK_NOT_COMPILED": CZResourceEx,
+}
+
+# Lower case message fragments of the connection errors raised by the rizomuvlink module
+TRANSPORT_ERROR_HINTS = ("timeout", "timed out", "time out", "connect", "socket", "zmq", "not responding")
+
+class CTaskResult:
+    """ Outcome of a task run with CRizomUVLink.Run
+
+        members:
+            task    : task name
+            value   : what the task returned
+            code    : documented return code if the task returned one, else None
+            seconds : wall clock duration of the call
+            warning : True if code is a warning code
+    """
+    def __init__(self, task : str, value, seconds : float):
+        self.task = task
+        self.value = value
+        self.code = value if type(value) is str and (value in SUCCESS_CODES or value in WARNING_CODES) else None
+        self.seconds = seconds
+        self.warning = self.code in WARNING_CODES
+
+    def __repr__(self):
+        return "CTaskResult(" + self.task + ", " + (self.code or type(self.value).__name__) + ", " + "%.3fs" % self.seconds + ")"
+
+def CheckReturnCode(task : str, value):
+    """ Raises the exception mapped to value if it is a documented error code, returns value otherwise """
+    if type(value) is str and value in ERROR_CODES:
+        raise ERROR_CODES[value](task + " failed: " + value, task, value)
+    return value
+
+def TypedError(task : str, error : Exception) -> CZTaskEx:
+    """ Converts an exception raised by the rizomuvlink module into a CZTaskEx subclass
+
+        Only used on the failure path: the message is searched for a documented code,
+        then for connection error hints.
+    """
+    message = str(error)
+    for code, exceptionClass in ERROR_CODES.items():
+        if code in message:
+            return exceptionClass(message, task, code)
+    lowered = message.lower()
+    if any(hint in lowered for hint in TRANSPORT_ERROR_HINTS):
+        return CZTransportEx(message, task)
+    return CZTaskFailedEx(message, task)
+
+def TimedCall(task : str, function, *args) -> CTaskResult:
+    """ Calls function(*args) and wraps its return value into a CTaskResult """
+    start = time.perf_counter()
+    value = function(*args)
+    return CTaskResult(task, value, time.perf_counter() - start)
@@ -0,0 +1,112 @@
+import random
+import time
+
+from RizomUVLinkResults import CZTransportEx, CZResourceEx
+
+# Tasks that give the same result when sent twice
+IDEMPOTENT_TASKS = {"Get", "GetAsString", "Count", "ItemNames", "Save", "RasterExport", "PsExport",
+                    "GenerateScriptingHelp", "Test", "Uvset"}
+
+def ExpandDottedKeys(params : dict) -> dict:
+    """ Converts the dotted keys of task parameters into nested tables: {"File.Path": p} into {"File": {"Path": p}}
+
+        RizomUV accepts both spellings, and they can be mixed in the same parameters.
+    """
+    nested = {}
+    for path, value in params.items():
+        keys = path.split(".")
+        node = nested
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        if isinstance(value, dict) and isinstance(node.get(keys[-1]), dict):
+            node[keys[-1]].update(ExpandDottedKeys(value))
+        else:
+            node[keys[-1]] = ExpandDottedKeys(value) if isinstance(value, dict) else value
+    return nested
+
+def IsIdempotent(task : str, params) -> bool:
+    """ Tells if a task can be sent again after an error without changing the result
+
+        Load is idempotent when it replaces the whole mesh (a file or full "Data"
+        polygon lists), not when it only updates some coordinates of the current mesh.
+        Select is when it resets the selection first. Uvset is, except in "Create" and
+        "Copy" modes. Tasks changing the mesh state (Cut, Weld, Unfold, Pack...) never are.
+        Parameters can be given nested or with dotted keys ({"File.Path": path}).
+    """
+    if not isinstance(params, dict):
+        return task in IDEMPOTENT_TASKS
+    params = ExpandDottedKeys(params)
+    if task == "Uvset":
+        return params.get("Mode", "SetCurrent") not in ("Create", "Copy")
+    if task in IDEMPOTENT_TASKS:
+        return True
+    if task == "Load":
+        return "File" in params or "PolySizes" in params.get("Data", {})
+    if task == "Select":
+        return bool(params.get("ResetBefore"))
+    return False
+
+class CRetryPolicy:
+    """ Exponential backoff retries
+
+        attempts    : total number of tries
+        baseDelay   : seconds before the second try, multiplied by multiplier after each try
+        maxDelay    : upper bound of the delay
+        jitter      : random fraction added to each delay, spreads the retries of parallel jobs
+        retryOn     : exception classes worth a retry
+    """
+    def __init__(self, attempts : int = 3, baseDelay : float = 0.2, maxDelay : float = 5.0, multiplier : float = 2.0,
+                 jitter : float = 0.1, retryOn : tuple = (CZTransportEx,)):
+        self.attempts = attempts
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retryOn = retryOn
+
+    def Delay(self, attempt : int) -> float:
+        """ Seconds to wait after the given failed attempt (0 based) """
+        delay = min(self.maxDelay, self.baseDelay * self.multiplier ** attempt)
+        return delay * (1.0 + random.uniform(0.0, self.jitter))
+
+    def Call(self, function, onRetry = None):
+        """ Calls function() until it succeeds, fails with a non retryable error or runs out of attempts
+
+            onRetry:
+                Optional onRetry(attempt, error) called before each new try.
+        """
+        for attempt in range(self.attempts):
+            try:
+                return function()
+            except self.retryOn as error:
+                if attempt == self.attempts - 1:
+                    raise
+                if onRetry is not None:
+                    onRetry(attempt, error)
+                time.sleep(self.Delay(attempt))
+
+# Job level retries replay on a fresh instance, which also helps when an instance ran out of resources
+DEFAULT_JOB_RETRY_POLICY = CRetryPolicy(attempts=3, baseDelay=1.0, maxDelay=30.0, retryOn=(CZTransportEx, CZResourceEx))
+
+def RunRecipe(pool, recipe, policy : CRetryPolicy = None) -> list:
+    """ Replays a CRizomUVRecipe on a pool instance, from its Load, until it succeeds
+
+        After a retryable error, the instance used is restarted by the pool (its state is
+        unknown) and the whole recipe is replayed on another instance.
+
+        returns:
+            The CTaskResult of each step of the successful replay.
+    """
+    recipe.Validate()
+    policy = policy or DEFAULT_JOB_RETRY_POLICY
+
+    def attempt():
+        with pool.Session() as link:
+            try:
+                return recipe.Replay(link)
+            except policy.retryOn:
+                # makes the pool restart the instance when the link is released
+                link.abandoned = True
+                raise
+
+    return policy.Call(attempt)
@@ -0,0 +1,239 @@
+import heapq
+import itertools
+import threading
+import time
+
+from RizomUVLinkBase import CZEx
+from RizomUVLinkCancel import CCancelToken, CZCancelled
+
+# Priority: lower runs first
+# Reserved: instances kept free for the class, other classes cannot use them
+# Preemptible: running jobs of the class can be cancelled and requeued for higher priority jobs
+DEFAULT_PRIORITY_CLASSES = {
+    "Interactive": {"Priority": 0, "Reserved": 1, "Preemptible": False},
+    "Batch": {"Priority": 10, "Reserved": 0, "Preemptible": True},
+}
+
+PENDING = "Pending"
+RUNNING = "Running"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+
+class CScheduledJob:
+    """ A function(link) submitted to CRizomUVLinkScheduler """
+    def __init__(self, function, className : str, deadline : float = None):
+        self.function = function
+        self.className = className
+        # absolute time.monotonic() deadline, None for no deadline
+        self.deadline = deadline
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.token = None
+        self.preempted = False
+        self.preemptionCount = 0
+        self.submitTime = time.monotonic()
+        self.startTime = None
+        self.endTime = None
+        self.done = threading.Event()
+
+    def Result(self, timeout : float = None):
+        """ Waits for the job and returns the function result, or raises its exception """
+        if not self.done.wait(timeout):
+            raise CZEx("Job not finished after " + str(timeout) + " seconds")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def QueueSeconds(self) -> float:
+        """ Time waited between the submission and the last start of the job """
+        return (self.startTime if self.startTime is not None else time.monotonic()) - self.submitTime
+
+class CRizomUVLinkScheduler:
+    """ Runs jobs on a CRizomUVLinkPool by priority class
+
+        Pending jobs are started by class priority then by earliest deadline. Each
+        class can reserve instances that lower priority classes never use, so
+        interactive jobs don't wait behind a batch backlog. When no instance is free
+        for a job, a running job of a lower priority preemptible class is cancelled
+        (its instance is restarted by the pool) and requeued ahead of its class.
+
+        Jobs are function(link) calls and must be restartable: start with a Load task
+        and have no side effect outside the instance before they complete. A job whose
+        deadline passed before it could start fails with a CZEx.
+    """
+    def __init__(self, pool, classes : dict = None):
+        self.pool = pool
+        self.classes = classes if classes is not None else DEFAULT_PRIORITY_CLASSES
+        self.pending = []
+        self.running = []
+        self.sequence = itertools.count()
+        self.closed = False
+        self.condition = threading.Condition()
+        # instances restarted by the pool free capacity without a job finishing
+        self.pool.spawnListeners.append(self.OnSpawn)
+        self.dispatcher = threading.Thread(target=self.Dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def Submit(self, function, className : str = "Batch", deadline : float = None) -> CScheduledJob:
+        """ Queues function(link)
+
+            deadline:
+                Seconds from now before which the job must start, None for no deadline.
+        """
+        if className not in self.classes:
+            raise CZEx("Unknown priority class: " + className)
+        job = CScheduledJob(function, className, None if deadline is None else time.monotonic() + deadline)
+        with self.condition:
+            if self.closed:
+                raise CZEx("The scheduler is closed")
+            self.Enqueue(job, next(self.sequence))
+            self.condition.notify_all()
+        return job
+
+    def Run(self, function, className : str = "Batch", deadline : float = None):
+        """ Submits a job and waits for its result """
+        return self.Submit(function, className, deadline).Result()
+
+    def Cancel(self, job : CScheduledJob):
+        with self.condition:
+            if job.state == PENDING:
+                self.pending = [entry for entry in self.pending if entry[-1] is not job]
+                heapq.heapify(self.pending)
+                self.Finish(job, CANCELLED, error=CZCancelled("Job cancelled before it started"))
+            elif job.state == RUNNING:
+                job.preempted = False
+                job.token.Cancel()
+
+    def Enqueue(self, job : CScheduledJob, sequence : int):
+        priority = self.classes[job.className]["Priority"]
+        deadline = job.deadline if job.deadline is not None else float("inf")
+        heapq.heappush(self.pending, (priority, deadline, sequence, job))
+
+    def Dispatch(self):
+        with self.condition:
+            while not self.closed:
+                self.StartJobs()
+                self.condition.wait(self.NextDeadlineDelay())
+
+    def NextDeadlineDelay(self) -> float:
+        """ Seconds until the earliest deadline of the pending jobs, None if none of them can expire (lock held) """
+        deadlines = [deadline for _, deadline, _, job in self.pending if deadline != float("inf") and not job.preemptionCount]
+        return max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+    def OnSpawn(self, link):
+        with self.condition:
+            self.condition.notify_all()
+
+    def StartJobs(self):
+        """ Starts as many pending jobs as the capacity allows, preempting if needed (lock held) """
+        self.ExpireJobs()
+        while self.pending:
+            priority, deadline, sequence, job = self.pending[0]
+            if self.FreeFor(job.className) > 0:
+                heapq.heappop(self.pending)
+                self.Start(job, sequence)
+                continue
+            while self.Preempt(priority):
+                pass
+            return
+
+    def ExpireJobs(self):
+        """ Fails the pending jobs whose deadline passed, wherever they are in the queue (lock held) """
+        now = time.monotonic()
+        expired = [entry for entry in self.pending if entry[1] < now and not entry[-1].preemptionCount]
+        if expired:
+            self.pending = [entry for entry in self.pending if entry[1] >= now or entry[-1].preemptionCount]
+            heapq.heapify(self.pending)
+            for *_, job in expired:
+                self.Finish(job, FAILED, error=CZEx("Deadline missed before the job could start"))
+
+    def FreeFor(self, className : str) -> int:
+        """ Count of instances a job of the class can use now, leaving out the ones the pool is restarting (lock held) """
+        runningCounts = {name: 0 for name in self.classes}
+        for running, _ in self.running:
+            runningCounts[running.className] += 1
+        free = self.pool.LiveCount() - len(self.running)
+        reservedByOthers = sum(max(0, settings["Reserved"] - runningCounts[name])
+                               for name, settings in self.classes.items() if name != className)
+        return free - reservedByOthers
+
+    def Preempt(self, priority : int) -> bool:
+        """ Cancels the most recent running job of the lowest preemptible class below priority (lock held)
+
+            Does nothing when enough preempted jobs are already releasing their instance
+            for the pending jobs of this priority or better.
+
+            returns:
+                True if a job has been preempted.
+        """
+        candidates = [(self.classes[job.className]["Priority"], job.startTime, job, sequence) for job, sequence in self.running
+                      if self.classes[job.className]["Preemptible"] and self.classes[job.className]["Priority"] > priority
+                      and not job.token.IsCancelled()]
+        inFlight = sum(1 for job, _ in self.running if job.preempted)
+        waiting = sum(1 for entry in self.pending if entry[0] <= priority)
+        if not candidates or inFlight >= waiting:
+            return False
+        _, _, job, sequence = max(candidates, key=lambda candidate: (candidate[0], candidate[1]))
+        job.preempted = True
+        job.preemptionCount += 1
+        job.token.Cancel()
+        # the preempted job still holds its instance until its thread returns
+        return True
+
+    def Start(self, job : CScheduledJob, sequence : int):
+        job.state = RUNNING
+        job.preempted = False
+        job.token = CCancelToken()
+        job.startTime = time.monotonic()
+        self.running.append((job, sequence))
+        threading.Thread(target=self.Execute, args=(job, sequence), daemon=True).start()
+
+    def Execute(self, job : CScheduledJob, sequence : int):
+        result, error = None, None
+        try:
+            with self.pool.Session(cancelToken=job.token) as link:
+                result = job.function(link)
+        except BaseException as e:
+            error = e
+        with self.condition:
+            self.running.remove((job, sequence))
+            if job.preempted and isinstance(error, CZCancelled) and not self.closed:
+                job.state = PENDING
+                # keep the original sequence number so the job goes back ahead of its class
+                self.Enqueue(job, sequence)
+            elif error is not None:
+                self.Finish(job, CANCELLED if isinstance(error, CZCancelled) else FAILED, error=error)
+            else:
+                self.Finish(job, DONE, result=result)
+            self.condition.notify_all()
+
+    def Finish(self, job : CScheduledJob, state : str, result = None, error : BaseException = None):
+        job.state, job.result, job.error = state, result, error
+        job.endTime = time.monotonic()
+        job.done.set()
+
+    def Close(self, cancelRunning : bool = False):
+        """ Cancels the pending jobs and stops the scheduler, waiting for the running jobs unless cancelRunning is True """
+        with self.condition:
+            self.closed = True
+            for *_, job in self.pending:
+                self.Finish(job, CANCELLED, error=CZCancelled("Scheduler closed"))
+            self.pending = []
+            running = [job for job, _ in self.running]
+            if cancelRunning:
+                for job in running:
+                    job.token.Cancel()
+            self.condition.notify_all()
+        if self.OnSpawn in self.pool.spawnListeners:
+            self.pool.spawnListeners.remove(self.OnSpawn)
+        for job in running:
+            job.done.wait()
+        self.dispatcher.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.Close()
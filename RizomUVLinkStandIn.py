@@ -0,0 +1,94 @@
+import os
+import time
+
+import numpy as np
+
+import RizomUVQuality
+from RizomUVLink import CRizomUVLink
+
+class CRizomUVStandInServer:
+    """ In-process stand-in for the connection object of the rizomuvlink module
+
+        It answers the tasks used by the orchestration code without running RizomUV:
+        Load and Save handle the "Data" mode and OBJ files, other tasks only wait for the
+        duration given in taskSeconds (for instance {"Pack": 0.5}) and leave the mesh
+        untouched. This is meant for orchestration-only runs (pools, schedulers,
+        benchmarks) on machines without a RizomUV license.
+    """
+    def __init__(self, taskSeconds : dict = None):
+        self.taskSeconds = taskSeconds if taskSeconds is not None else {}
+        self.mesh = None
+        self.address = None
+
+    def VersionString(self):
+        return "stand-in"
+
+    def Connect(self, address : str):
+        self.address = address
+
+    def TCPPortIsOpen(self, port : int):
+        return False
+
+    def Execute(self, commandName, parameters, timeout):
+        time.sleep(self.taskSeconds.get(commandName, 0.0))
+        if commandName == "Get" and parameters == "Vars.Infos.Version.Full":
+            return "stand-in"
+        if commandName == "Load":
+            return self.Load(parameters)
+        if commandName == "Save":
+            return self.Save(parameters)
+        return None
+
+    def Load(self, params : dict):
+        if "File" in params:
+            path = params["File"].get("Path", "")
+            if not os.path.exists(path):
+                return "IMPORT_TASK_FILE_NOT_FOUND"
+            self.mesh = RizomUVQuality.ReadOBJ(path) if path.lower().endswith(".obj") else None
+            return "IMPORT_TASK_SUCCES"
+        data = params.get("Data", {})
+        if "PolySizes" in data:
+            self.mesh = {key: np.asarray(value) for key, value in data.items() if key.startswith(("Coords", "Poly"))}
+            if "CoordsUVW" not in self.mesh:
+                self.mesh["CoordsUVW"] = self.mesh["CoordsXYZ"]
+                self.mesh["PolyUVWIDs"] = self.mesh["PolyXYZIDs"]
+        elif "CoordsUVW" in data and self.mesh is not None:
+            self.mesh["CoordsUVW"] = np.asarray(data["CoordsUVW"], dtype=np.float64)
+        return "IMPORT_TASK_SUCCES"
+
+    def Save(self, params : dict):
+        if "File" in params:
+            path = params["File"].get("Path", "")
+            if self.mesh is not None and path.lower().endswith(".obj"):
+                RizomUVQuality.WriteOBJ(path, self.mesh)
+            return "EXPORT_TASK_SUCCES"
+        result = {}
+        if self.mesh is not None and "Data" in params:
+            result["Data"] = {key: self.mesh[key].tolist() for key in ("PolySizes", "PolyUVWIDs", "CoordsUVW")}
+        if self.mesh is not None and "IndexTable" in params:
+            polygonIslands = RizomUVQuality.PolygonIslands(self.mesh)
+            vertexIslands = np.zeros(len(self.mesh["CoordsUVW"]) // 3, dtype=np.int64)
+            vertexIslands[self.mesh["PolyUVWIDs"]] = np.repeat(polygonIslands, self.mesh["PolySizes"])
+            result["IndexTable"] = {
+                "PolygonIDsToIslandIDs": polygonIslands.tolist(),
+                "VertexIDsToIslandIDs": vertexIslands.tolist(),
+            }
+        return result
+
+class CRizomUVLinkStandIn(CRizomUVLink):
+    """ CRizomUVLink connected to a CRizomUVStandInServer instead of a RizomUV instance
+
+        Can be given as linkClass to CRizomUVLinkPool.
+    """
+    def __init__(self, taskSeconds : dict = None):
+        # the base constructor is not called, it would create the native connection object
+        self.rizomuv = CRizomUVStandInServer(taskSeconds)
+        self.version = self.rizomuv.VersionString()
+        self.name = "RizomUV Link (stand-in)"
+        self.InitState()
+
+    def RunRizomUV(self, exePath : str = None, port : int = None, connect : bool = True, wait : bool = True) -> int:
+        self.port = port if port is not None else self.FindFreePort()
+        if connect:
+            self.Connect(self.port)
+        return self.port
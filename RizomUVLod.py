@@ -0,0 +1,240 @@
+import numpy as np
+
+import RizomUVQuality
+
+# Query points processed at once, bounds the memory of the (point, triangle) candidate pairs
+QUERY_CHUNK_SIZE = 1 << 16
+# Cell size ratio between two levels of CTriangleGrid
+GRID_LEVEL_GROWTH = 4
+# Short relaxation of the transferred layouts, on every island
+LOD_OPTIMIZE_PARAMS = {"PrimType": "Island", "Iterations": 5, "TriangleFlips": True}
+
+def ClosestPointsOnTriangles(points : np.ndarray, a : np.ndarray, b : np.ndarray, c : np.ndarray) -> tuple:
+    """ Closest points of (n, 3) triangles [a, b, c] to (n, 3) points, by Voronoi region of the triangle
+
+        returns:
+            (barycentrics, distances) where barycentrics is a (n, 3) array of the weights of
+            a, b and c and distances the (n,) squared distances.
+    """
+    ab, ac = b - a, c - a
+    dot = lambda u, v: np.einsum("ij,ij->i", u, v)
+    ap, bp, cp = points - a, points - b, points - c
+    d1, d2 = dot(ab, ap), dot(ac, ap)
+    d3, d4 = dot(ab, bp), dot(ac, bp)
+    d5, d6 = dot(ab, cp), dot(ac, cp)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = va + vb + vc
+        v, w = vb / denominator, vc / denominator
+        tAB = d1 / (d1 - d3)
+        tAC = d2 / (d2 - d6)
+        tBC = (d4 - d3) / ((d4 - d3) + (d5 - d6))
+    # Voronoi regions of the corners and edges in test order, the first one matching wins, then the inside
+    regions = [(d1 <= 0) & (d2 <= 0), (d3 >= 0) & (d4 <= d3), (vc <= 0) & (d1 >= 0) & (d3 <= 0),
+               (d6 >= 0) & (d5 <= d6), (vb <= 0) & (d2 >= 0) & (d6 <= 0), (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)]
+    weights = np.stack([
+        np.select(regions, [1.0, 0.0, 1.0 - tAB, 0.0, 1.0 - tAC, 0.0], 1.0 - v - w),
+        np.select(regions, [0.0, 1.0, tAB, 0.0, 0.0, 1.0 - tBC], v),
+        np.select(regions, [0.0, 0.0, 0.0, 1.0, tAC, tBC], w),
+    ], axis=1)
+    # degenerate triangles fall back to their first corner
+    weights[~np.all(np.isfinite(weights), axis=1)] = (1.0, 0.0, 0.0)
+
+    closest = weights[:, 0:1] * a + weights[:, 1:2] * b + weights[:, 2:3] * c
+    return weights, np.einsum("ij,ij->i", points - closest, points - closest)
+
+def ExpandRanges(starts : np.ndarray, counts : np.ndarray) -> tuple:
+    """ For ranges [start, start + count), returns (owners, values): the range index and the value of each element """
+    owners = np.repeat(np.arange(len(starts)), counts)
+    return owners, np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+class CTriangleGridLevel:
+    """ Uniform grid over some of the 3D triangles of a mesh answering nearest triangle queries
+
+        Each triangle is registered in every cell its bounding box covers. Queries search
+        the cells around the points within a radius growing until the result is exact.
+    """
+    def __init__(self, triangles : np.ndarray, ids : np.ndarray, islands : np.ndarray, cellSize : float):
+        self.ids = ids
+        self.triangles = triangles[ids]
+        self.islands = islands[ids] if islands is not None else None
+        low, high = self.triangles.min(axis=1), self.triangles.max(axis=1)
+        self.cellSize = cellSize
+        self.origin = low.min(axis=0) if len(low) else np.zeros(3)
+        self.shape = (np.floor((high.max(axis=0) - self.origin) / self.cellSize).astype(np.int64) + 1) if len(low) else np.ones(3, dtype=np.int64)
+
+        lowCells, highCells = self.Cells(low), self.Cells(high)
+        cells, triangles = self.BoxCells(lowCells, highCells)
+        order = np.argsort(cells, kind="stable")
+        self.cellKeys, self.cellTriangles = cells[order], triangles[order]
+
+    def Cells(self, points : np.ndarray) -> np.ndarray:
+        return np.clip(np.floor((points - self.origin) / self.cellSize).astype(np.int64), 0, self.shape - 1)
+
+    def BoxCells(self, lowCells : np.ndarray, highCells : np.ndarray) -> tuple:
+        """ Cell keys of the cells between lowCells and highCells (inclusive) and the box index of each """
+        spans = highCells - lowCells + 1
+        boxes, offsets = ExpandRanges(np.zeros(len(spans), dtype=np.int64), np.prod(spans, axis=1))
+        span = spans[boxes]
+        x = lowCells[boxes, 0] + offsets % span[:, 0]
+        y = lowCells[boxes, 1] + (offsets // span[:, 0]) % span[:, 1]
+        z = lowCells[boxes, 2] + offsets // (span[:, 0] * span[:, 1])
+        return (x * self.shape[1] + y) * self.shape[2] + z, boxes
+
+    def Candidates(self, points : np.ndarray, radius : int) -> tuple:
+        """ (point, triangle) index pairs of the triangles registered within radius cells of the points """
+        cells = self.Cells(points)
+        keys, owners = self.BoxCells(np.maximum(cells - radius, 0), np.minimum(cells + radius, self.shape - 1))
+        starts = np.searchsorted(self.cellKeys, keys, side="left")
+        counts = np.searchsorted(self.cellKeys, keys, side="right") - starts
+        entries, positions = ExpandRanges(starts, counts)
+        return owners[entries], self.cellTriangles[positions]
+
+    def SearchedDistances(self, points : np.ndarray, radius : int) -> np.ndarray:
+        """ Distance from the points to the border of the cells searched within radius, infinite on the grid borders """
+        cells = self.Cells(points)
+        low, high = cells - radius, cells + radius + 1
+        toLow = np.where(low > 0, points - (self.origin + low * self.cellSize), np.inf)
+        toHigh = np.where(high < self.shape, self.origin + high * self.cellSize - points, np.inf)
+        return np.minimum(toLow, toHigh).min(axis=1)
+
+    def Nearest(self, points : np.ndarray, islands : np.ndarray = None) -> tuple:
+        """ Finds the nearest triangle of each point, among the triangles of the given island if islands is given
+
+            The cell of each point is searched first. A nearest triangle closer than the
+            border of the searched cells is exact, for the other points the radius grows.
+
+            returns:
+                (triangles, barycentrics, distances), the triangle is -1 if the island has none.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        nearest = np.full(len(points), -1, dtype=np.int64)
+        weights = np.zeros((len(points), 3))
+        distances = np.full(len(points), np.inf)
+        pending = np.arange(len(points))
+        radius = 0
+        while len(pending):
+            covering = bool(np.all(radius >= self.shape - 1))
+            unresolved = []
+            for start in range(0, len(pending), QUERY_CHUNK_SIZE):
+                chunk = pending[start:start + QUERY_CHUNK_SIZE]
+                owners, triangles = self.Candidates(points[chunk], radius)
+                if islands is not None:
+                    keep = self.islands[triangles] == islands[chunk][owners]
+                    owners, triangles = owners[keep], triangles[keep]
+                corners = self.triangles[triangles]
+                candidateWeights, candidateDistances = ClosestPointsOnTriangles(points[chunk][owners], corners[:, 0], corners[:, 1], corners[:, 2])
+                # best candidate of each point: first of its group sorted by distance
+                order = np.lexsort((candidateDistances, owners))
+                first = order[np.concatenate(([True], owners[order][1:] != owners[order][:-1]))] if len(order) else order
+                found = chunk[owners[first]]
+                nearest[found] = triangles[first]
+                weights[found] = candidateWeights[first]
+                distances[found] = candidateDistances[first]
+                if not covering:
+                    unresolved.append(chunk[~(distances[chunk] <= self.SearchedDistances(points[chunk], radius) ** 2)])
+            pending = np.concatenate(unresolved) if unresolved else pending[:0]
+            radius = radius * 2 if radius else 1
+        nearest[nearest >= 0] = self.ids[nearest[nearest >= 0]]
+        return nearest, weights, distances
+
+class CTriangleGrid:
+    """ Grids of increasing cell sizes over the 3D triangles of a mesh answering nearest triangle queries
+
+        The finest cell size is the average triangle bounding box size. Each triangle goes
+        to the finest grid whose cells are at least half its largest extent, so it is
+        registered in 27 cells at most: a few large triangles (caps, ground planes) don't
+        fill the fine grid. Queries take the nearest of the exact results of each grid.
+    """
+    def __init__(self, triangles : np.ndarray, islands : np.ndarray = None):
+        self.triangles = np.asarray(triangles, dtype=np.float64)
+        extents = self.triangles.max(axis=1) - self.triangles.min(axis=1)
+        cellSize = max(float(extents.mean()), 1e-9) if len(extents) else 1.0
+        ratios = np.maximum(extents.max(axis=1) / (2.0 * cellSize), 1.0)
+        levels = np.ceil(np.log(ratios) / np.log(GRID_LEVEL_GROWTH) - 1e-9).astype(np.int64)
+        self.levels = [CTriangleGridLevel(self.triangles, np.flatnonzero(levels == level), islands, cellSize * GRID_LEVEL_GROWTH ** int(level))
+                       for level in np.unique(levels)]
+
+    def Nearest(self, points : np.ndarray, islands : np.ndarray = None) -> tuple:
+        """ Finds the nearest triangle of each point, among the triangles of the given island if islands is given
+
+            returns:
+                (triangles, barycentrics, distances), the triangle is -1 if the island has none.
+        """
+        nearest = np.full(len(points), -1, dtype=np.int64)
+        weights = np.zeros((len(points), 3))
+        distances = np.full(len(points), np.inf)
+        for level in self.levels:
+            levelNearest, levelWeights, levelDistances = level.Nearest(points, islands)
+            closer = levelDistances < distances
+            nearest[closer], weights[closer], distances[closer] = levelNearest[closer], levelWeights[closer], levelDistances[closer]
+        return nearest, weights, distances
+
+class CRizomUVLodTransfer:
+    """ Transfers the UVs of an unwrapped mesh (LOD0) onto its lower LODs
+
+        The island of each LOD polygon is the one of the LOD0 triangle nearest to its
+        centroid, then each polygon corner gets the UV of its nearest point on that
+        island, so polygons don't straddle LOD0 seams. Corners of the same vertex and
+        island share a UV vertex. The LOD0 spatial index is built once for the chain.
+    """
+    def __init__(self, source : dict):
+        self.source = source
+        xyz = np.asarray(source["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+        xyzIDs = np.asarray(source["PolyXYZIDs"], dtype=np.int64)
+        self.uvw = np.asarray(source["CoordsUVW"], dtype=np.float64).reshape(-1, 3)
+        uvwIDs = np.asarray(source["PolyUVWIDs"], dtype=np.int64)
+        a, b, c, polygons = RizomUVQuality.TriangleFan(source["PolySizes"])
+        self.triangleUVWIDs = np.stack([uvwIDs[a], uvwIDs[b], uvwIDs[c]], axis=1)
+        self.triangleIslands = RizomUVQuality.PolygonIslands(source)[polygons]
+        self.grid = CTriangleGrid(np.stack([xyz[xyzIDs[a]], xyz[xyzIDs[b]], xyz[xyzIDs[c]]], axis=1), self.triangleIslands)
+
+    def Transfer(self, target : dict) -> dict:
+        """ Returns the target mesh data dictionary with the transferred "CoordsUVW", "PolyUVWIDs" and "PolygonIDsToIslandIDs" """
+        xyz = np.asarray(target["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+        sizes = np.asarray(target["PolySizes"], dtype=np.int64)
+        xyzIDs = np.asarray(target["PolyXYZIDs"], dtype=np.int64)
+        starts = np.cumsum(sizes) - sizes
+
+        centroids = np.add.reduceat(xyz[xyzIDs], starts, axis=0) / sizes[:, None] if len(sizes) else np.zeros((0, 3))
+        polygonIslands = self.triangleIslands[self.grid.Nearest(centroids)[0]]
+        cornerIslands = np.repeat(polygonIslands, sizes)
+        triangles, weights, _ = self.grid.Nearest(xyz[xyzIDs], cornerIslands)
+        cornerUVWs = np.einsum("ij,ijk->ik", weights, self.uvw[self.triangleUVWIDs[triangles]])
+
+        keys = xyzIDs * (int(polygonIslands.max()) + 1 if len(polygonIslands) else 1) + cornerIslands
+        uniqueKeys, firsts, uvwIDs = np.unique(keys, return_index=True, return_inverse=True)
+        data = dict(target)
+        data["CoordsUVW"] = cornerUVWs[firsts].ravel()
+        data["PolyUVWIDs"] = uvwIDs.ravel()
+        data["PolygonIDsToIslandIDs"] = polygonIslands
+        return data
+
+    def TransferOnLink(self, link, target : dict, outputPath : str = None, optimizeParams : dict = None) -> dict:
+        """ Loads the transferred layout of a LOD into an instance and relaxes it with a short Optimize
+
+            The whole mesh is sent with Load "Data", the LOD UV topology being new.
+
+            returns:
+                The CRizomUVLink.SaveData output after Optimize. If outputPath is given, the
+                LOD is also saved into that file.
+        """
+        data = self.Transfer(target)
+        keys = ("CoordsXYZ", "PolySizes", "PolyXYZIDs", "CoordsUVW", "PolyUVWIDs")
+        link.Load({"Data": {key: np.asarray(data[key]).tolist() for key in keys}})
+        link.Optimize(optimizeParams or LOD_OPTIMIZE_PARAMS)
+        if outputPath:
+            link.Save({"File": {"Path": outputPath}})
+        return link.SaveData()
+
+def TransferLODChain(pool, sourcePath : str, lodPaths : list, outputPaths : list = None, optimizeParams : dict = None) -> list:
+    """ Transfers the UVs of an unwrapped LOD0 file onto LOD files, one pool instance per LOD in parallel
+
+        returns:
+            The CRizomUVLink.SaveData output of each LOD.
+    """
+    transfer = CRizomUVLodTransfer(RizomUVQuality.ReadOBJ(sourcePath))
+    outputPaths = outputPaths or [None] * len(lodPaths)
+    jobs = list(zip(lodPaths, outputPaths))
+    return pool.Map(lambda link, job: transfer.TransferOnLink(link, RizomUVQuality.ReadOBJ(job[0]), job[1], optimizeParams), jobs)
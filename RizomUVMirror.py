@@ -0,0 +1,102 @@
+import numpy as np
+
+import RizomUVQuality
+from RizomUVIslands import CRizomUVIslandIndex
+from RizomUVPacking import ReadCurrentMesh
+
+class CRizomUVMeshMirror(CRizomUVIslandIndex):
+    """ Local NumPy copy of the mesh loaded in a RizomUV instance
+
+        Extends the island index with the 3D and UV space arrays, so inspection scripts
+        read counts, bounds and island statistics from memory instead of sending Get and
+        Count tasks. Like the index, the mirror is updated lazily on the next query
+        following a mutating task.
+
+        The UV data comes from the Save task "Data" mode. The 3D data doesn't change
+        after a Load: it is taken from the Load parameters in "Data" mode, otherwise it is
+        read once through a temporary OBJ file.
+
+        Arrays (in addition to the island index ones):
+            xyz, uvw        : (vertexCount, 3) 3D and UV space coordinates
+            polySizes       : vertex count of each polygon
+            polyXYZIDs      : flat 3D vertex indices of the polygons
+            polyUVWIDs      : flat UVW vertex indices of the polygons
+    """
+    def __init__(self, link):
+        self.xyzStale = True
+        super().__init__(link)
+
+    def OnTask(self, commandName, parameters, error):
+        super().OnTask(commandName, parameters, error)
+        if commandName == "Load" and isinstance(parameters, dict):
+            data = parameters.get("Data", {})
+            if "CoordsXYZ" in data and "PolyXYZIDs" in data:
+                self.xyz = np.asarray(data["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+                self.polyXYZIDs = np.asarray(data["PolyXYZIDs"], dtype=np.int64)
+                self.xyzStale = False
+            elif "File" in parameters or "PolySizes" in data:
+                self.xyzStale = True
+
+    def Refresh(self):
+        data = self.link.SaveData()
+        if self.xyzStale:
+            current = ReadCurrentMesh(self.link)
+            self.xyz = current["CoordsXYZ"].reshape(-1, 3)
+            self.polyXYZIDs = current["PolyXYZIDs"]
+            self.xyzStale = False
+        self.uvw = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)
+        self.polySizes = np.asarray(data["PolySizes"], dtype=np.int64)
+        self.polyUVWIDs = np.asarray(data["PolyUVWIDs"], dtype=np.int64)
+        return self.Build(data)
+
+    def Data(self) -> dict:
+        """ Returns the mirror as a mesh data dictionary, as used by RizomUVQuality """
+        self.Update()
+        return {
+            "CoordsXYZ": self.xyz.ravel(),
+            "CoordsUVW": self.uvw.ravel(),
+            "PolySizes": self.polySizes,
+            "PolyXYZIDs": self.polyXYZIDs,
+            "PolyUVWIDs": self.polyUVWIDs,
+            "PolygonIDsToIslandIDs": self.polygonIslands,
+        }
+
+    def Counts(self) -> dict:
+        self.Update()
+        return {
+            "Polygons": len(self.polySizes),
+            "Vertices": len(self.xyz),
+            "UVWVertices": len(self.uvw),
+            "Islands": self.islandCount,
+        }
+
+    def Bounds(self, space : str = "UVW") -> tuple:
+        """ Returns the (min, max) corners of the "UVW" or "XYZ" space bounding box """
+        self.Update()
+        coords = self.uvw if space == "UVW" else self.xyz
+        if not len(coords):
+            return np.zeros(3), np.zeros(3)
+        return coords.min(axis=0), coords.max(axis=0)
+
+    def IslandStats(self) -> dict:
+        """ Per island statistics
+
+            returns:
+                A dictionary of (islandCount,) arrays: "PolygonCount", "UVArea", "XYZArea",
+                "TexelDensity" (sqrt(UV area / 3D area)), "Flipped" (count of polygons
+                with a negative UV area) and the (islandCount, 4) "Boxes" array.
+        """
+        data = self.Data()
+        uvAreas = RizomUVQuality.PolygonUVAreas(data)
+        count = self.islandCount
+        uvArea = np.bincount(self.polygonIslands, weights=np.abs(uvAreas), minlength=count)
+        xyzArea = np.bincount(self.polygonIslands, weights=RizomUVQuality.PolygonXYZAreas(data), minlength=count)
+        density = np.sqrt(np.divide(uvArea, xyzArea, out=np.zeros(count), where=xyzArea > 0))
+        return {
+            "PolygonCount": np.diff(self.islandStarts),
+            "UVArea": uvArea,
+            "XYZArea": xyzArea,
+            "TexelDensity": density,
+            "Flipped": np.bincount(self.polygonIslands, weights=uvAreas < 0, minlength=count).astype(np.int64),
+            "Boxes": self.boxes,
+        }
@@ -0,0 +1,162 @@
+import argparse
+import sys
+
+import numpy as np
+
+import RizomUVQuality
+
+# Candidate triangle pairs generated and tested at once, bounds the memory of FindOverlaps
+PAIR_CHUNK_SIZE = 1 << 20
+
+def UVTriangles(data : dict) -> tuple:
+    """ Fan triangulates the UV polygons
+
+        returns:
+            (triangles, islands) where triangles is a (triangleCount, 3, 2) array of UV
+            corners and islands the island ID of each triangle. Degenerate triangles are
+            left out.
+    """
+    uv = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)[:, :2]
+    corners = np.asarray(data["PolyUVWIDs"], dtype=np.int64)
+    a, b, c, polygons = RizomUVQuality.TriangleFan(data["PolySizes"])
+    triangles = np.stack([uv[corners[a]], uv[corners[b]], uv[corners[c]]], axis=1)
+    e1, e2 = triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    keep = np.abs(e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]) > 1e-14
+    return triangles[keep], RizomUVQuality.PolygonIslands(data)[polygons[keep]]
+
+def GridCandidatePairs(boxes : np.ndarray, cellSize : float, chunkSize : int = PAIR_CHUNK_SIZE):
+    """ Yields the pairs of triangles sharing at least one cell of a uniform grid, chunk by chunk
+
+        Pairs are generated for about chunkSize candidates at a time, so the memory doesn't
+        depend on the total candidate count. A pair whose bounding boxes overlap is reported
+        once, by the cell holding the lower corner of the boxes intersection, the others are
+        skipped.
+
+        boxes:
+            (triangleCount, 4) [uMin, vMin, uMax, vMax] bounding boxes.
+
+        yields:
+            (pairCount, 2) arrays of (i, j) pairs with i < j.
+    """
+    low = np.floor(boxes[:, :2] / cellSize).astype(np.int64)
+    high = np.floor(boxes[:, 2:] / cellSize).astype(np.int64)
+    if len(low):
+        offset = low.min(axis=0)
+        low, high = low - offset, high - offset
+    spans = high - low + 1
+    counts = spans[:, 0] * spans[:, 1]
+
+    # one entry per (triangle, covered cell)
+    triangles = np.repeat(np.arange(len(boxes)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    columns = low[triangles, 0] + offsets % spans[triangles, 0]
+    rows = low[triangles, 1] + offsets // spans[triangles, 0]
+    width = int(high[:, 0].max()) + 1 if len(high) else 1
+    cells = rows * width + columns
+
+    order = np.argsort(cells, kind="stable")
+    cells, triangles = cells[order], triangles[order]
+    # each entry is paired with the following entries of the same cell
+    groupEnds = np.searchsorted(cells, cells, side="right")
+    pairCounts = groupEnds - np.arange(len(cells)) - 1
+    pairEnds = np.cumsum(pairCounts)
+
+    start = 0
+    while start < len(cells):
+        end = max(int(np.searchsorted(pairEnds, pairEnds[start] - pairCounts[start] + chunkSize, side="right")), start + 1)
+        chunkCounts = pairCounts[start:end]
+        first = np.repeat(np.arange(start, end), chunkCounts)
+        second = first + 1 + np.arange(chunkCounts.sum()) - np.repeat(np.cumsum(chunkCounts) - chunkCounts, chunkCounts)
+        a, b = triangles[first], triangles[second]
+        # lower corner cell of the intersection, covered by both boxes when they overlap
+        lowA, lowB, highA, highB = low[a], low[b], high[a], high[b]
+        corner = np.maximum(lowA, lowB)
+        keep = (corner[:, 0] <= highA[:, 0]) & (corner[:, 0] <= highB[:, 0]) & \
+               (corner[:, 1] <= highA[:, 1]) & (corner[:, 1] <= highB[:, 1]) & \
+               (corner[:, 1] * width + corner[:, 0] == cells[first])
+        a, b = a[keep], b[keep]
+        yield np.stack([np.minimum(a, b), np.maximum(a, b)], axis=1)
+        start = end
+
+# Column wise reductions of (n, 3) arrays, much faster than max(axis=1) on small rows
+def Largest(values : np.ndarray) -> np.ndarray:
+    return np.maximum(np.maximum(values[:, 0], values[:, 1]), values[:, 2])
+
+def Smallest(values : np.ndarray) -> np.ndarray:
+    return np.minimum(np.minimum(values[:, 0], values[:, 1]), values[:, 2])
+
+def TrianglesOverlap(first : np.ndarray, second : np.ndarray, tolerance : float = 1e-9) -> np.ndarray:
+    """ Separating axis test of triangle pairs, (pairCount, 3, 2) arrays
+
+        Triangles only touching along an edge or at a corner (within tolerance) don't overlap.
+
+        returns:
+            A (pairCount,) boolean array.
+    """
+    overlap = np.ones(len(first), dtype=bool)
+    for triangles in (first, second):
+        for k in range(3):
+            edge = triangles[:, (k + 1) % 3] - triangles[:, k]
+            axis = np.stack([-edge[:, 1], edge[:, 0]], axis=1)
+            axis /= np.maximum(np.linalg.norm(axis, axis=1, keepdims=True), 1e-300)
+            projectedFirst = np.einsum("pcj,pj->pc", first, axis)
+            projectedSecond = np.einsum("pcj,pj->pc", second, axis)
+            separated = (Largest(projectedFirst) <= Smallest(projectedSecond) + tolerance) | \
+                        (Largest(projectedSecond) <= Smallest(projectedFirst) + tolerance)
+            overlap &= ~separated
+    return overlap
+
+def FindOverlaps(data : dict, includeSelf : bool = False, tolerance : float = 1e-9) -> dict:
+    """ Finds the overlapping islands of a layout
+
+        Triangles are put in a uniform grid whose cell size is twice their average
+        bounding box size, candidate pairs sharing a cell are filtered by bounding box
+        then tested with the separating axis theorem.
+
+        includeSelf:
+            Also report islands overlapping themselves, as (island, island) pairs.
+
+        returns:
+            A dictionary {(islandA, islandB): overlapping triangle pair count} with islandA <= islandB.
+    """
+    triangles, islands = UVTriangles(data)
+    if len(triangles) < 2:
+        return {}
+    boxes = np.concatenate([triangles.min(axis=1), triangles.max(axis=1)], axis=1)
+    extent = boxes[:, 2:] - boxes[:, :2]
+    cellSize = max(2.0 * float(extent.mean()), 1e-9)
+
+    found = {}
+    for chunk in GridCandidatePairs(boxes, cellSize):
+        a, b = chunk[:, 0], chunk[:, 1]
+        if not includeSelf:
+            keep = islands[a] != islands[b]
+            a, b = a[keep], b[keep]
+        boxA, boxB = boxes[a], boxes[b]
+        keep = (boxA[:, 0] < boxB[:, 2] - tolerance) & (boxA[:, 1] < boxB[:, 3] - tolerance) & \
+               (boxB[:, 0] < boxA[:, 2] - tolerance) & (boxB[:, 1] < boxA[:, 3] - tolerance)
+        a, b = a[keep], b[keep]
+        overlapping = TrianglesOverlap(triangles[a], triangles[b], tolerance)
+        islandPairs = np.sort(np.stack([islands[a[overlapping]], islands[b[overlapping]]], axis=1), axis=1)
+        if len(islandPairs):
+            keys, counts = np.unique(islandPairs, axis=0, return_counts=True)
+            for (islandA, islandB), count in zip(keys.tolist(), counts.tolist()):
+                found[(islandA, islandB)] = found.get((islandA, islandB), 0) + count
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the overlapping UV islands of OBJ files, exits with 1 if any")
+    parser.add_argument("files", nargs="+", help="OBJ files to check")
+    parser.add_argument("--self", dest="includeSelf", action="store_true", help="also report self overlapping islands")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.files:
+        overlaps = FindOverlaps(RizomUVQuality.ReadOBJ(path), args.includeSelf)
+        if overlaps:
+            failed = True
+            print(path + ": " + ", ".join("%d/%d" % pair for pair in sorted(overlaps)))
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+import RizomUVQuality
+from RizomUVLinkCancel import CCancelToken, CZCancelled
+
+def UDIMTile(udim : int) -> tuple:
+    """ Returns the (column, row) position in UV space of a UDIM tile number (1001 is (0, 0)) """
+    return (udim - 1001) % 10, (udim - 1001) // 10
+
+def IslandUVBoxes(data : dict) -> tuple:
+    """ Computes the UV bounding box and UV area of each island from CRizomUVLink.SaveData output
+
+        returns:
+            (boxes, areas) where boxes is a (islandCount, 4) array of [uMin, vMin, uMax, vMax]
+            and areas a (islandCount,) array of UV space areas.
+    """
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    corners = np.asarray(data["PolyUVWIDs"], dtype=np.int64)
+    uvs = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)[:, :2]
+    polyIslands = np.asarray(data["PolygonIDsToIslandIDs"], dtype=np.int64)
+    islandCount = int(polyIslands.max()) + 1 if len(polyIslands) else 0
+
+    cornerIslands = np.repeat(polyIslands, sizes)
+    cornerUVs = uvs[corners]
+    boxes = np.empty((islandCount, 4))
+    boxes[:, :2] = np.inf
+    boxes[:, 2:] = -np.inf
+    np.minimum.at(boxes[:, 0], cornerIslands, cornerUVs[:, 0])
+    np.minimum.at(boxes[:, 1], cornerIslands, cornerUVs[:, 1])
+    np.maximum.at(boxes[:, 2], cornerIslands, cornerUVs[:, 0])
+    np.maximum.at(boxes[:, 3], cornerIslands, cornerUVs[:, 1])
+
+    # shoelace formula over each polygon, the next corner of the last corner is the first one
+    starts = np.cumsum(sizes) - sizes
+    following = np.arange(len(corners)) + 1
+    following[starts + sizes - 1] = starts
+    nextUVs = cornerUVs[following]
+    cross = cornerUVs[:, 0] * nextUVs[:, 1] - nextUVs[:, 0] * cornerUVs[:, 1]
+    polyAreas = np.abs(np.add.reduceat(cross, starts)) * 0.5 if len(starts) else np.zeros(0)
+    areas = np.bincount(polyIslands, weights=polyAreas, minlength=islandCount)
+    return boxes, areas
+
+def AssignIslandsToTiles(data : dict, tileCount : int = None) -> dict:
+    """ Distributes the islands over UDIM tiles
+
+        If tileCount is None, each island goes to the tile containing the center of its
+        bounding box (like the "DistributeInTilesByBBox" mode of IslandGroups), or to the
+        nearest tile when that center is outside the UDIM range (u in 0..10, v >= 0).
+        Otherwise the islands are spread evenly over tileCount tiles, biggest islands
+        first, so that each tile receives roughly the same UV area.
+
+        returns:
+            A dictionary {udim: [islandIDs]}
+    """
+    boxes, areas = IslandUVBoxes(data)
+    tiles = {}
+    if tileCount is None:
+        centers = (boxes[:, :2] + boxes[:, 2:]) * 0.5
+        cells = np.floor(centers).astype(np.int64)
+        # UDIM numbers only cover columns 0 to 9 and rows from 0, outside islands go to the nearest tile
+        cells[:, 0] = np.clip(cells[:, 0], 0, 9)
+        cells[:, 1] = np.maximum(cells[:, 1], 0)
+        udims = 1001 + cells[:, 0] + 10 * cells[:, 1]
+        for islandID, udim in enumerate(udims.tolist()):
+            tiles.setdefault(udim, []).append(islandID)
+    else:
+        loads = np.zeros(tileCount)
+        for islandID in np.argsort(-areas).tolist():
+            tile = int(np.argmin(loads))
+            loads[tile] += areas[islandID]
+            tiles.setdefault(1001 + tile, []).append(islandID)
+    return tiles
+
+def PackTile(link, meshPath : str, islandIDs : list, packParams : dict = {}) -> dict:
+    """ Packs the given islands alone into the unit tile of a pool instance
+
+        returns:
+            The CRizomUVLink.SaveData output of the instance after packing.
+    """
+    link.Load({"File": {"Path": meshPath, "XYZUVW": True}})
+    link.Hide({"PrimType": "Island", "Isolate": True, "UseList": islandIDs})
+    params = dict(packParams)
+    params.setdefault("Translate", True)
+    params["WorkingSet"] = "Visible"
+    link.Pack(params)
+    return link.SaveData()
+
+def PackUDIMTiles(pool, meshPath : str, outputPath : str = None, tileCount : int = None, packParams : dict = {}) -> tuple:
+    """ Packs a multi tile (UDIM) layout with one pool instance per tile
+
+        The islands are assigned to tiles (see AssignIslandsToTiles), each tile is packed
+        on its own instance in parallel, then the per tile layouts are offset to their
+        tile position and merged. The packing time is close to the one of the slowest tile.
+
+        The islands of a tile are isolated with the Hide task on their instance, so the
+        other tiles don't take any room in the packed tile.
+
+        returns:
+            (tiles, coordsUVW) where tiles is the {udim: [islandIDs]} assignment and
+            coordsUVW the merged (vertexCount, 3) UVW coordinates. If outputPath is given,
+            the merged layout is also saved into that file.
+    """
+    with pool.Session() as link:
+        link.Load({"File": {"Path": meshPath, "XYZUVW": True}})
+        data = link.SaveData()
+    tiles = AssignIslandsToTiles(data, tileCount)
+
+    results = pool.Map(lambda link, tile: PackTile(link, meshPath, tile[1], packParams), list(tiles.items()))
+
+    vertexIslands = np.asarray(data["VertexIDsToIslandIDs"], dtype=np.int64)
+    coords = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3).copy()
+    for (udim, islandIDs), result in zip(tiles.items(), results):
+        packed = np.asarray(result["CoordsUVW"], dtype=np.float64).reshape(-1, 3)
+        mask = np.isin(vertexIslands, islandIDs)
+        coords[mask] = packed[mask]
+        coords[mask, :2] += UDIMTile(udim)
+
+    if outputPath:
+        with pool.Session() as link:
+            link.Load({"File": {"Path": meshPath, "XYZUVW": True}})
+            link.Load({"Data": {"CoordsUVW": coords.ravel().tolist()}})
+            link.Save({"File": {"Path": outputPath}})
+    return tiles, coords
+
+# Candidate map resolutions of EstimatePackSettings
+MAP_RESOLUTIONS = (512, 1024, 2048, 4096, 8192)
+# Fraction of the tile the island bounding boxes (padding included) end up covering
+# after Pack, islands nest into each other so this is usually between 0.7 and 0.9
+PACK_BOX_EFFICIENCY = 0.75
+
+def PackPaddingPixels(mapResolution : int) -> float:
+    """ Default padding for a map resolution: 8 pixels at 2048, scaled with the resolution, 2 pixels at least """
+    return max(2.0, mapResolution / 256.0)
+
+def EstimateFootprint(boxes : np.ndarray, areas : np.ndarray, mapResolution : int, paddingPx : float, marginPx : float,
+                      efficiency : float = PACK_BOX_EFFICIENCY) -> dict:
+    """ Predicts the layout Pack gives at a map resolution, from the unpacked island boxes
+
+        The islands are assumed to keep their relative sizes and to be scaled by a common
+        factor s. Each island takes its bounding box grown by the padding, and these boxes
+        cover efficiency of the tile inside the margin:
+            sum((w * s + p) * (h * s + p)) = efficiency * (1 - 2 * m) ** 2
+        which is solved for s. Padding costs more when there are many small islands.
+
+        returns:
+            A dictionary with "MapResolution", "PaddingSize" and "MarginSize" (UV units),
+            "Scale" (s, 0.0 if the padding alone doesn't fit), "TexelDensity" (pixels per
+            unit of the unpacked islands) and "Coverage" (predicted UV area ratio).
+    """
+    padding = paddingPx / mapResolution
+    margin = marginPx / mapResolution
+    sizes = boxes[:, 2:] - boxes[:, :2]
+    a = float(np.sum(sizes[:, 0] * sizes[:, 1]))
+    b = padding * float(np.sum(sizes))
+    c = len(boxes) * padding * padding - efficiency * max(0.0, 1.0 - 2.0 * margin) ** 2
+    if a <= 0.0 or c >= 0.0:
+        scale = 0.0
+    else:
+        scale = (-b + np.sqrt(b * b - 4.0 * a * c)) / (2.0 * a)
+    return {
+        "MapResolution": int(mapResolution),
+        "PaddingSize": padding,
+        "MarginSize": margin,
+        "Scale": float(scale),
+        "TexelDensity": float(scale * mapResolution),
+        "Coverage": float(scale * scale * np.sum(areas)),
+    }
+
+def EstimatePackSettings(data : dict, targetTexelDensity : float = None, paddingPx : float = None, marginPx : float = None,
+                         resolutions : tuple = MAP_RESOLUTIONS, defaultResolution : int = 2048,
+                         efficiency : float = PACK_BOX_EFFICIENCY) -> dict:
+    """ Recommends the Pack map resolution, padding and margin of a mesh before packing it
+
+        data is the CRizomUVLink.SaveData output of the unfolded mesh, so that the island
+        sizes are still in 3D units. With a target texel density (pixels per 3D unit), the
+        smallest resolution reaching it is chosen, or the largest one if none does. Without
+        a target, defaultResolution is used and only the padding and densities are estimated.
+
+        paddingPx:
+            Padding in pixels, PackPaddingPixels of each resolution by default.
+        marginPx:
+            Margin in pixels, half the padding by default.
+
+        returns:
+            The EstimateFootprint dictionary of the chosen resolution, with "PaddingPixels",
+            "MarginPixels", "TargetReached" and "Candidates", the estimates of every resolution.
+    """
+    boxes, areas = IslandUVBoxes(data)
+    candidates = []
+    for resolution in sorted(resolutions):
+        padding = PackPaddingPixels(resolution) if paddingPx is None else paddingPx
+        margin = padding * 0.5 if marginPx is None else marginPx
+        estimate = EstimateFootprint(boxes, areas, resolution, padding, margin, efficiency)
+        estimate["PaddingPixels"] = padding
+        estimate["MarginPixels"] = margin
+        candidates.append(estimate)
+
+    if targetTexelDensity is None:
+        chosen = min(candidates, key=lambda estimate: abs(estimate["MapResolution"] - defaultResolution))
+        reached = None
+    else:
+        reaching = [estimate for estimate in candidates if estimate["TexelDensity"] >= targetTexelDensity]
+        chosen = reaching[0] if reaching else candidates[-1]
+        reached = bool(reaching)
+    return dict(chosen, TargetReached=reached, Candidates=candidates)
+
+def PackParamsFromEstimate(estimate : dict, packParams : dict = {}) -> dict:
+    """ Pack task parameters using the map resolution, padding and margin of an EstimatePackSettings result """
+    params = dict(packParams)
+    params.setdefault("Translate", True)
+    params["Global"] = dict(params.get("Global", {}), MapResolution=estimate["MapResolution"],
+                            PaddingSize=estimate["PaddingSize"], MarginSize=estimate["MarginSize"])
+    return params
+
+# Default search space of CPackAutotuner. Keys are the dotted names of the Pack element
+# properties put into "Global", None means that the property is not specified.
+# Resolution takes precedence over Accuracy when both are given, see PACK_OVERRIDDEN_PARAMS.
+PACK_TUNING_SPACE = {
+    "Resolution": [None, 256, 512, 1024, 2048],
+    "Accuracy": [None, 0.002, 0.001, 0.0005],
+    "MaxMutations": [1, 2, 4, 8],
+    "Rotate.Step": [0.0, 90.0, 45.0, 15.0],
+    "Scaling.Optimization": ["None", "Fill"],
+}
+
+# Properties that Pack ignores when another one is given: {ignored: overriding}
+PACK_OVERRIDDEN_PARAMS = {"Accuracy": "Resolution"}
+
+def NestedParams(flatParams : dict) -> dict:
+    """ Converts {"Rotate.Step": 90.0} into {"Rotate": {"Step": 90.0}}, skipping None values """
+    nested = {}
+    for path, value in flatParams.items():
+        if value is None:
+            continue
+        keys = path.split(".")
+        node = nested
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+    return nested
+
+def ExpandMatrix(space : dict, overridden : dict = PACK_OVERRIDDEN_PARAMS) -> list:
+    """ Returns every distinct flat parameter set of a {name: [values]} space
+
+        A property of overridden is set to None when its overriding property is given,
+        and the parameter sets this makes identical are only returned once.
+    """
+    keys = list(space)
+    matrix, seen = [], set()
+    for values in itertools.product(*(space[key] for key in keys)):
+        flatParams = dict(zip(keys, values))
+        for ignored, overriding in overridden.items():
+            if ignored in flatParams and flatParams.get(overriding) is not None:
+                flatParams[ignored] = None
+        key = tuple(flatParams.values())
+        if key not in seen:
+            seen.add(key)
+            matrix.append(flatParams)
+    return matrix
+
+def ReadCurrentMesh(link) -> dict:
+    """ Reads back the mesh loaded in an instance, 3D space data included, through a temporary OBJ file """
+    with tempfile.TemporaryDirectory() as folder:
+        objPath = os.path.join(folder, "current.obj")
+        link.Save({"File": {"Path": objPath}})
+        return RizomUVQuality.ReadOBJ(objPath)
+
+def ReadReferenceMesh(link, meshPath : str) -> dict:
+    """ Loads a mesh file and reads back its 3D space data
+
+        Pack doesn't change the 3D data nor the polygon order, so this is done once per
+        mesh and combined with the SaveData output of each packing run.
+    """
+    link.Load({"File": {"Path": meshPath, "XYZUVW": True}})
+    return ReadCurrentMesh(link)
+
+class CPackAutotuner:
+    """ Searches the Pack settings giving the best layout within a wall clock budget
+
+        Trials run concurrently, one per pool instance. Each layout is scored client-side
+        with RizomUVQuality.LayoutScore (UV coverage and texel density uniformity). The best
+        settings found for an asset class are stored in a JSON presets file and tried first
+        the next time the same class is tuned.
+    """
+    def __init__(self, pool, presetsPath : str = None, space : dict = None, baseParams : dict = None, seed : int = None):
+        self.pool = pool
+        self.presetsPath = presetsPath
+        self.space = space if space is not None else PACK_TUNING_SPACE
+        self.baseParams = baseParams if baseParams is not None else {"Translate": True}
+        self.random = random.Random(seed)
+        self.presets = {}
+        # (flat parameters, exception) of the trials that raised, in completion order
+        self.failedTrials = []
+        # flat parameters of the trials cancelled at the end of the budget
+        self.cancelledTrials = []
+        self.lock = threading.Lock()
+        if presetsPath and os.path.exists(presetsPath):
+            with open(presetsPath, "r") as f:
+                self.presets = json.load(f)
+
+    def PackParams(self, flatParams : dict) -> dict:
+        params = dict(self.baseParams)
+        params["Global"] = dict(self.baseParams.get("Global", {}), **NestedParams(flatParams))
+        return params
+
+    def Candidates(self, assetClass : str = None):
+        """ Yields flat parameter sets: the stored preset of the class first, then the space in random order """
+        preset = self.presets.get(assetClass) if assetClass else None
+        if preset:
+            yield preset["Params"]
+        candidates = ExpandMatrix(self.space)
+        self.random.shuffle(candidates)
+        for candidate in candidates:
+            if preset and candidate == preset["Params"]:
+                continue
+            yield candidate
+
+    def Trial(self, meshPath : str, reference : dict, flatParams : dict, cancelToken : CCancelToken = None) -> tuple:
+        """ returns: (score, pack seconds, trial seconds) """
+        with self.pool.Session(cancelToken=cancelToken) as link:
+            start = time.perf_counter()
+            link.Load({"File": {"Path": meshPath, "XYZUVW": True}})
+            packStart = time.perf_counter()
+            link.Pack(self.PackParams(flatParams))
+            packSeconds = time.perf_counter() - packStart
+            data = dict(reference, **link.SaveData())
+            return RizomUVQuality.LayoutScore(data), packSeconds, time.perf_counter() - start
+
+    def Tune(self, meshPath : str, budget : float, assetClass : str = None) -> tuple:
+        """ Explores the search space for at most budget seconds
+
+            New trials are not started when the average trial time would exceed the budget,
+            and the trials still running when it ends are cancelled (their instances are
+            restarted by the pool) and recorded in cancelledTrials. A trial that raises is
+            counted with the worst score and recorded in failedTrials.
+
+            returns:
+                (params, score, trialCount) for the best flat parameter set found.
+        """
+        deadline = time.perf_counter() + budget
+        with self.pool.Session() as link:
+            reference = ReadReferenceMesh(link, meshPath)
+        candidates = self.Candidates(assetClass)
+        best, bestScore, bestSeconds, trialSeconds, trialCount = None, -1.0, None, [], 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            while True:
+                estimate = sum(trialSeconds) / len(trialSeconds) if trialSeconds else 0.0
+                while len(running) < self.pool.size and time.perf_counter() + estimate < deadline:
+                    candidate = next(candidates, None)
+                    if candidate is None:
+                        break
+                    token = CCancelToken()
+                    running[executor.submit(self.Trial, meshPath, reference, candidate, token)] = (candidate, token)
+                if not running:
+                    break
+                done, _ = wait(running, timeout=max(0.0, deadline - time.perf_counter()), return_when=FIRST_COMPLETED)
+                if not done and time.perf_counter() >= deadline:
+                    # a cancelled task stops being waited for at once, so the trials return quickly
+                    for _, token in running.values():
+                        token.Cancel()
+                    done, _ = wait(running)
+                for future in done:
+                    candidate, _ = running.pop(future)
+                    try:
+                        score, packSeconds, seconds = future.result()
+                    except CZCancelled:
+                        self.cancelledTrials.append(candidate)
+                        continue
+                    except Exception as e:
+                        trialCount += 1
+                        self.failedTrials.append((candidate, e))
+                        continue
+                    trialCount += 1
+                    trialSeconds.append(seconds)
+                    if score > bestScore:
+                        best, bestScore, bestSeconds = candidate, score, packSeconds
+                if time.perf_counter() >= deadline and not running:
+                    break
+
+        if assetClass and best is not None:
+            self.RecordPreset(assetClass, best, bestScore, bestSeconds)
+        return best, bestScore, trialCount
+
+    def RecordPreset(self, assetClass : str, params : dict, score : float, seconds : float):
+        with self.lock:
+            stored = self.presets.get(assetClass)
+            if stored and stored["Score"] >= score:
+                return
+            self.presets[assetClass] = {"Params": params, "Score": score, "Seconds": seconds}
+            if self.presetsPath:
+                with open(self.presetsPath, "w") as f:
+                    json.dump(self.presets, f, indent=4)
@@ -0,0 +1,271 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Mesh data dictionaries use the member names of the Load and Save tasks "Data" mode:
+#   CoordsXYZ, PolyXYZIDs     : 3D space coordinates and polygon indices
+#   CoordsUVW, PolyUVWIDs     : UV space coordinates and polygon indices
+#   PolySizes                 : vertex count of each polygon
+#   PolygonIDsToIslandIDs     : island of each polygon (optional, computed if missing)
+
+def ReadOBJ(path : str) -> dict:
+    """ Reads the geometry of an OBJ file, such as one written by the Save task
+
+        returns:
+            A mesh data dictionary with flat "CoordsXYZ", "CoordsUVW", "PolySizes",
+            "PolyXYZIDs" and "PolyUVWIDs" arrays.
+
+        Raises a ValueError when a face has no UV index (a mesh without "vt" lines).
+    """
+    xyz, uvw, sizes, xyzIDs, uvwIDs = [], [], [], [], []
+    with open(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            if line.startswith("v "):
+                xyz.extend(float(x) for x in line.split()[1:4])
+            elif line.startswith("vt "):
+                values = [float(x) for x in line.split()[1:4]]
+                uvw.extend(values + [0.0] * (3 - len(values)))
+            elif line.startswith("f "):
+                corners = line.split()[1:]
+                sizes.append(len(corners))
+                for corner in corners:
+                    ids = corner.split("/")
+                    if len(ids) < 2 or not ids[1]:
+                        raise ValueError(path + ", line " + str(number) + ": face without UV indices, the mesh has no UVs")
+                    v, t = int(ids[0]), int(ids[1])
+                    # negative OBJ indices are relative to the end of the list read so far
+                    xyzIDs.append(v - 1 if v > 0 else len(xyz) // 3 + v)
+                    uvwIDs.append(t - 1 if t > 0 else len(uvw) // 3 + t)
+    return {
+        "CoordsXYZ": np.asarray(xyz, dtype=np.float64),
+        "CoordsUVW": np.asarray(uvw, dtype=np.float64),
+        "PolySizes": np.asarray(sizes, dtype=np.int64),
+        "PolyXYZIDs": np.asarray(xyzIDs, dtype=np.int64),
+        "PolyUVWIDs": np.asarray(uvwIDs, dtype=np.int64),
+    }
+
+def WriteOBJ(path : str, data : dict):
+    """ Writes a mesh data dictionary into an OBJ file (positions, UVWs and polygons) """
+    xyz = np.asarray(data["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+    uvw = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    xyzIDs = np.asarray(data["PolyXYZIDs"], dtype=np.int64) + 1
+    uvwIDs = np.asarray(data["PolyUVWIDs"], dtype=np.int64) + 1
+    with open(path, "w") as f:
+        f.writelines("v %.9g %.9g %.9g\n" % tuple(p) for p in xyz)
+        f.writelines("vt %.9g %.9g %.9g\n" % tuple(t) for t in uvw)
+        start = 0
+        for size in sizes.tolist():
+            corners = zip(xyzIDs[start:start + size].tolist(), uvwIDs[start:start + size].tolist())
+            f.write("f " + " ".join("%d/%d" % corner for corner in corners) + "\n")
+            start += size
+
+def TriangleFan(sizes) -> tuple:
+    """ Triangulates polygons as fans around their first corner
+
+        returns:
+            (a, b, c, polygons) arrays: the corner indices (into the flat polygon index
+            lists) of each triangle and the polygon each triangle comes from.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    starts = np.cumsum(sizes) - sizes
+    triCounts = np.maximum(sizes - 2, 0)
+    polygons = np.repeat(np.arange(len(sizes)), triCounts)
+    k = np.arange(len(polygons)) - np.repeat(np.cumsum(triCounts) - triCounts, triCounts) + 1
+    a = starts[polygons]
+    b = a + k
+    return a, b, b + 1, polygons
+
+def PolygonUVAreas(data : dict) -> np.ndarray:
+    """ Signed UV space area of each polygon (negative when the polygon is flipped) """
+    uv = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)[:, :2]
+    corners = np.asarray(data["PolyUVWIDs"], dtype=np.int64)
+    a, b, c, polygons = TriangleFan(data["PolySizes"])
+    pa, pb, pc = uv[corners[a]], uv[corners[b]], uv[corners[c]]
+    e1, e2 = pb - pa, pc - pa
+    areas = 0.5 * (e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0])
+    return np.bincount(polygons, weights=areas, minlength=len(data["PolySizes"]))
+
+def PolygonXYZAreas(data : dict) -> np.ndarray:
+    """ 3D space area of each polygon """
+    xyz = np.asarray(data["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+    corners = np.asarray(data["PolyXYZIDs"], dtype=np.int64)
+    a, b, c, polygons = TriangleFan(data["PolySizes"])
+    pa = xyz[corners[a]]
+    areas = 0.5 * np.linalg.norm(np.cross(xyz[corners[b]] - pa, xyz[corners[c]] - pa), axis=1)
+    return np.bincount(polygons, weights=areas, minlength=len(data["PolySizes"]))
+
+def PolygonIslands(data : dict) -> np.ndarray:
+    """ Island ID of each polygon
+
+        Uses "PolygonIDsToIslandIDs" when present, otherwise the islands are the connected
+        components of polygons sharing UV vertices.
+    """
+    if "PolygonIDsToIslandIDs" in data:
+        return np.asarray(data["PolygonIDsToIslandIDs"], dtype=np.int64)
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    corners = np.asarray(data["PolyUVWIDs"], dtype=np.int64)
+    polyCount = len(sizes)
+    if polyCount == 0:
+        return np.zeros(0, dtype=np.int64)
+    cornerPolygons = np.repeat(np.arange(polyCount), sizes)
+    labels = np.arange(polyCount)
+    while True:
+        vertexLabels = np.full(int(corners.max()) + 1, polyCount)
+        np.minimum.at(vertexLabels, corners, labels[cornerPolygons])
+        newLabels = np.full(polyCount, polyCount)
+        np.minimum.at(newLabels, cornerPolygons, vertexLabels[corners])
+        # labels are polygon IDs of the same component, following them shortens long chains
+        newLabels = newLabels[newLabels]
+        if np.array_equal(newLabels, labels):
+            break
+        labels = newLabels
+    return np.unique(labels, return_inverse=True)[1]
+
+def Coverage(data : dict) -> float:
+    """ Ratio of the UV area used by polygons to the area of the occupied unit tiles """
+    areas = np.abs(PolygonUVAreas(data))
+    if not len(areas):
+        return 0.0
+    uv = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)[:, :2]
+    corners = np.asarray(data["PolyUVWIDs"], dtype=np.int64)
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    centers = np.add.reduceat(uv[corners], np.cumsum(sizes) - sizes, axis=0) / sizes[:, None]
+    tileCount = len(np.unique(np.floor(centers).astype(np.int64), axis=0))
+    return float(areas.sum() / tileCount)
+
+def IslandTexelDensities(data : dict) -> tuple:
+    """ Texel density of each island: sqrt(UV area / 3D area), 0 for islands without 3D area
+
+        returns:
+            (densities, xyzAreas) arrays indexed by island ID.
+    """
+    islands = PolygonIslands(data)
+    uvAreas = np.bincount(islands, weights=np.abs(PolygonUVAreas(data)))
+    xyzAreas = np.bincount(islands, weights=PolygonXYZAreas(data), minlength=len(uvAreas))
+    densities = np.sqrt(np.divide(uvAreas, xyzAreas, out=np.zeros(len(uvAreas)), where=xyzAreas > 0))
+    return densities, xyzAreas
+
+def TexelUniformity(data : dict) -> float:
+    """ 1 minus the coefficient of variation of the island texel densities (1 is perfectly uniform)
+
+        Islands are weighted by their 3D area.
+    """
+    densities, xyzAreas = IslandTexelDensities(data)
+    valid = xyzAreas > 0
+    if not valid.any():
+        return 0.0
+    densities = densities[valid]
+    weights = xyzAreas[valid]
+    mean = np.average(densities, weights=weights)
+    if mean <= 0:
+        return 0.0
+    deviation = np.sqrt(np.average((densities - mean) ** 2, weights=weights))
+    return float(max(0.0, 1.0 - deviation / mean))
+
+def PolygonAreaDistortion(data : dict) -> np.ndarray:
+    """ Ratio of the share of the UV area to the share of the 3D area of each polygon
+
+        1 means that the polygon has the same relative size in UV and 3D space, 2 that it
+        is twice as big in UV space as the average. Polygons without 3D area get 1.
+    """
+    uvAreas = np.abs(PolygonUVAreas(data))
+    xyzAreas = PolygonXYZAreas(data)
+    uvTotal, xyzTotal = uvAreas.sum(), xyzAreas.sum()
+    if uvTotal <= 0 or xyzTotal <= 0:
+        return np.ones(len(uvAreas))
+    return np.divide(uvAreas / uvTotal, xyzAreas / xyzTotal, out=np.ones(len(uvAreas)), where=xyzAreas > 0)
+
+def CornerAngles(coords : np.ndarray, corners : np.ndarray, sizes : np.ndarray) -> np.ndarray:
+    """ Inner angle in radians at each polygon corner, in the order of the flat polygon index list """
+    starts = np.cumsum(sizes) - sizes
+    index = np.arange(len(corners))
+    following = index + 1
+    following[starts + sizes - 1] = starts
+    previous = index - 1
+    previous[starts] = starts + sizes - 1
+    points = coords[corners]
+    a = points[previous] - points
+    b = points[following] - points
+    dot = np.einsum("ij,ij->i", a, b)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.arccos(np.clip(np.divide(dot, norms, out=np.zeros(len(dot)), where=norms > 0), -1.0, 1.0))
+
+def PolygonAngleDistortion(data : dict) -> np.ndarray:
+    """ Mean absolute difference in radians between the 3D and UV corner angles of each polygon (0 is conformal) """
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    if not len(sizes):
+        return np.zeros(0)
+    xyz = np.asarray(data["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+    uvw = np.asarray(data["CoordsUVW"], dtype=np.float64).reshape(-1, 3)
+    xyzAngles = CornerAngles(xyz, np.asarray(data["PolyXYZIDs"], dtype=np.int64), sizes)
+    uvAngles = CornerAngles(uvw, np.asarray(data["PolyUVWIDs"], dtype=np.int64), sizes)
+    return np.add.reduceat(np.abs(xyzAngles - uvAngles), np.cumsum(sizes) - sizes) / sizes
+
+def FlippedTriangles(data : dict) -> np.ndarray:
+    """ Count of triangles of the polygons with a clockwise UV winding, per island
+
+        The winding is the sign of the whole polygon area (the fan sum of PolygonUVAreas
+        is the shoelace formula), so concave n-gons whose fan has reversed triangles are
+        not reported. A flipped polygon counts as its size - 2 triangles.
+    """
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    flipped = PolygonUVAreas(data) < 0
+    islands = PolygonIslands(data)
+    return np.bincount(islands, weights=flipped * np.maximum(sizes - 2, 0), minlength=int(islands.max()) + 1 if len(islands) else 0).astype(np.int64)
+
+def IslandCount(data : dict) -> int:
+    islands = PolygonIslands(data)
+    return int(islands.max()) + 1 if len(islands) else 0
+
+def LayoutStats(data : dict) -> dict:
+    """ Packing quality figures of a layout: coverage, island count and texel density uniformity """
+    return {
+        "Coverage": Coverage(data),
+        "IslandCount": IslandCount(data),
+        "ScaleUniformity": TexelUniformity(data),
+    }
+
+def QualityReport(data : dict) -> dict:
+    """ UV quality figures of a mesh with its 3D data
+
+        Area and angle distortions are averaged over the polygons weighted by their 3D
+        area. "AreaDistortion" is the mean of |log2(PolygonAreaDistortion)|, 0 meaning
+        no relative scaling, 1 that polygons are on average twice too big or too small.
+    """
+    # islands are needed by several figures, computing them once saves most of the time
+    data = dict(data, PolygonIDsToIslandIDs=PolygonIslands(data))
+    xyzAreas = PolygonXYZAreas(data)
+    weights = xyzAreas if xyzAreas.sum() > 0 else None
+    areaDistortion = np.abs(np.log2(np.maximum(PolygonAreaDistortion(data), 1e-12)))
+    angleDistortion = PolygonAngleDistortion(data)
+    hasPolygons = len(xyzAreas) > 0
+    return {
+        "Coverage": Coverage(data),
+        "IslandCount": IslandCount(data),
+        "TexelUniformity": TexelUniformity(data),
+        "FlippedTriangles": int(FlippedTriangles(data).sum()),
+        "AreaDistortion": float(np.average(areaDistortion, weights=weights)) if hasPolygons else 0.0,
+        "MaxAreaDistortion": float(areaDistortion.max()) if hasPolygons else 0.0,
+        "AngleDistortion": float(np.average(angleDistortion, weights=weights)) if hasPolygons else 0.0,
+    }
+
+def FileQualityReport(path : str) -> dict:
+    return dict(QualityReport(ReadOBJ(path)), Path=path)
+
+def BatchQualityReport(paths : list, workers : int = None) -> list:
+    """ Computes the QualityReport of many OBJ files in parallel processes
+
+        returns:
+            The reports in the order of paths, with their "Path".
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(FileQualityReport, paths, chunksize=max(1, len(paths) // (4 * (workers or os.cpu_count() or 1)))))
+
+def LayoutScore(data : dict, coverageWeight : float = 1.0, uniformityWeight : float = 1.0) -> float:
+    """ Weighted geometric mean of Coverage and TexelUniformity, used to rank packing results """
+    coverage = max(Coverage(data), 1e-9)
+    uniformity = max(TexelUniformity(data), 1e-9)
+    total = coverageWeight + uniformityWeight
+    return float(np.exp((coverageWeight * np.log(coverage) + uniformityWeight * np.log(uniformity)) / total))
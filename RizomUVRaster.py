@@ -0,0 +1,82 @@
+import math
+import os
+
+# RasterExport settings of the maps used by the lookdev review sheets
+RASTER_PRESETS = {
+    "Wireframe": {"PolygonColorMode": "Off", "EdgeColorMode": "Color", "TransparentBackground": True},
+    "ColorIDMap": {"PolygonColorMode": "ColorIDMap", "EdgeColorMode": "Off", "EdgePaddingSize": 4.0},
+    "Stretches": {"PolygonColorMode": "Stretches", "EdgeColorMode": "Color", "AASamples": 4},
+}
+
+def RasterVariant(meshPath : str, filePath : str, params : dict = {}, uvSet : str = None) -> dict:
+    """ Describes one RasterExport call: the mesh to load, the UV set to render and the task parameters """
+    return {"MeshPath": meshPath, "UVSet": uvSet, "Params": dict(params, FilePath=filePath)}
+
+def RasterVariants(meshPath : str, outputFolder : str, presets : list = None, resolutions : list = (1024,), uvSets : list = (None,), extension : str = "png") -> list:
+    """ Builds the variants of a mesh for every combination of preset, resolution and UV set
+
+        Files are named <mesh>_<uvSet>_<preset>_<resolution>.<extension> in outputFolder.
+    """
+    baseName = os.path.splitext(os.path.basename(meshPath))[0]
+    variants = []
+    for uvSet in uvSets:
+        for preset in (presets if presets is not None else list(RASTER_PRESETS)):
+            for resolution in resolutions:
+                parts = [baseName] + ([uvSet] if uvSet else []) + [preset, str(resolution)]
+                filePath = os.path.join(outputFolder, "_".join(parts) + "." + extension)
+                params = dict(RASTER_PRESETS[preset], Width=float(resolution), Height=float(resolution), WidthHeightUnit="px")
+                variants.append(RasterVariant(meshPath, filePath, params, uvSet))
+    return variants
+
+def RasterJobs(variants : list, instanceCount : int) -> list:
+    """ Groups variants into jobs sharing one mesh Load
+
+        The variants of a mesh are split into several jobs only when the mesh has more
+        than its share of the variants per instance, so that a mesh with many variants
+        doesn't keep a single instance busy while the others are idle.
+        Inside a job, variants are sorted by UV set so each set is made current once.
+
+        returns:
+            A list of variant lists, biggest first.
+    """
+    meshes = {}
+    for variant in variants:
+        meshes.setdefault(variant["MeshPath"], []).append(variant)
+    jobs = []
+    for meshVariants in meshes.values():
+        meshVariants.sort(key=lambda variant: variant["UVSet"] or "")
+        chunkCount = min(len(meshVariants), max(1, round(instanceCount * len(meshVariants) / len(variants))))
+        chunkSize = math.ceil(len(meshVariants) / chunkCount)
+        jobs.extend(meshVariants[start:start + chunkSize] for start in range(0, len(meshVariants), chunkSize))
+    jobs.sort(key=len, reverse=True)
+    return jobs
+
+def RenderRasterJob(link, job : list) -> list:
+    """ Loads the mesh of a job once then renders all its variants
+
+        returns:
+            The file paths written.
+    """
+    link.Load({"File": {"Path": job[0]["MeshPath"], "XYZUVW": True, "FBX": {"UseUVSetNames": True}}})
+    currentSet = None
+    for variant in job:
+        if variant["UVSet"] and variant["UVSet"] != currentSet:
+            link.Uvset({"Mode": "SetCurrent", "Name": variant["UVSet"]})
+            currentSet = variant["UVSet"]
+        link.RasterExport(variant["Params"])
+    return [variant["Params"]["FilePath"] for variant in job]
+
+def ExportRasterBatch(pool, variants : list) -> list:
+    """ Renders many RasterExport variants, spreading them over the pool instances
+
+        Each instance loads a mesh once for all the variants of its job and writes its
+        images itself, so the files of different jobs are written concurrently.
+
+        returns:
+            The file paths written, in the order of the jobs.
+    """
+    for folder in {os.path.dirname(variant["Params"]["FilePath"]) for variant in variants}:
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+    results = pool.Map(RenderRasterJob, RasterJobs(variants, pool.size))
+    return [path for paths in results for path in paths]
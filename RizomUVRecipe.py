@@ -0,0 +1,95 @@
+import json
+
+from RizomUVLinkBase import CZEx
+
+class CRizomUVRecipe:
+    """ A replayable sequence of tasks starting with a Load
+
+        Because it starts by loading its mesh, a recipe gives the same result on any
+        instance whatever its previous state, so failed jobs can be replayed from the
+        start on a fresh instance.
+
+        Steps are added by task name, or with the task methods of CRizomUVLink:
+            recipe = CRizomUVRecipe().Load({"File": {"Path": path}}).Unfold({}).Pack({})
+    """
+    def __init__(self, steps : list = None):
+        self.steps = list(steps) if steps else []
+
+    def Step(self, task : str, params = {}):
+        """ Appends a task and returns the recipe """
+        self.steps.append((task, params))
+        return self
+
+    def __getattr__(self, task : str):
+        if task.startswith("_") or not task[:1].isupper():
+            raise AttributeError(task)
+        return lambda params = {}: self.Step(task, params)
+
+    def UVSetStage(self, name : str, steps, source : str = None):
+        """ Appends the steps producing one more UV set of the loaded mesh
+
+            The UV set starts as a copy of source, or of the current UV set if source is
+            None, so it keeps the seams of the loaded file. It becomes the current UV set
+            and the steps (a list of (task, params) or a recipe without Load) are applied
+            to it only, so they must not contain a Load. Several UV sets (e.g. texture and
+            lightmap) can so be produced from one Load with different Unfold / Pack settings:
+                recipe = CRizomUVRecipe().Load({"File": {"Path": path, "FBX": {"UseUVSetNames": True}}})
+                recipe.UVSetStage("Texture", CRizomUVRecipe().Pack({"Global": {"PaddingSize": 0.002}}))
+                recipe.UVSetStage("Lightmap", CRizomUVRecipe().Pack({"Global": {"PaddingSize": 0.02}}), "Texture")
+                recipe.Uvset({"Mode": "Delete", "Name": "UVMap"})
+                recipe.SaveUVSets(outputPath)
+            The UV set of the file is kept, and saved first, unless it is deleted as above.
+        """
+        steps = steps.steps if isinstance(steps, CRizomUVRecipe) else list(steps)
+        if any(task == "Load" for task, _ in steps):
+            raise CZEx("The steps of a UV set stage must not contain a Load task, it would replace the mesh and its other UV sets")
+        if source is not None:
+            self.Step("Uvset", {"Mode": "SetCurrent", "Name": source})
+        self.Step("Uvset", {"Mode": "Copy", "Name": name})
+        self.Step("Uvset", {"Mode": "SetCurrent", "Name": name})
+        self.steps.extend(steps)
+        return self
+
+    def SaveUVSets(self, path : str):
+        """ Appends the Save of all the UV sets into one file, under their names """
+        return self.Step("Save", {"File": {"Path": path, "FBX": {"UseUVSetNames": True}}})
+
+    def Validate(self):
+        if not self.steps or self.steps[0][0] != "Load":
+            raise CZEx("A recipe must start with a Load task")
+
+    def Replay(self, link) -> list:
+        """ Runs all the steps on a link
+
+            returns:
+                The CTaskResult of each step.
+        """
+        self.Validate()
+        return [link.Run(task, params) for task, params in self.steps]
+
+    def ToJSON(self) -> str:
+        return json.dumps([{"Task": task, "Params": params} for task, params in self.steps], indent=4)
+
+    @staticmethod
+    def FromJSON(text : str):
+        return CRizomUVRecipe([(step["Task"], step["Params"]) for step in json.loads(text)])
+
+def MultiUVSetRecipe(meshPath : str, uvSets : dict, fileUVSet : str, outputPath : str = None) -> CRizomUVRecipe:
+    """ A recipe producing several UV sets from one Load and saving them with one Save
+
+        uvSets:
+            {name: steps} in creation order, see CRizomUVRecipe.UVSetStage. Each UV set
+            starts from the previous one, the first from the UV set of the file.
+        fileUVSet:
+            Name of the UV set of the file. It is deleted before the Save, so the file
+            only holds the uvSets, in their order.
+        outputPath:
+            The mesh file is overwritten if None.
+    """
+    if fileUVSet in uvSets:
+        raise CZEx("The UV set of the file would be deleted: " + fileUVSet)
+    recipe = CRizomUVRecipe().Load({"File": {"Path": meshPath, "XYZUVW": True, "FBX": {"UseUVSetNames": True}}})
+    for name, steps in uvSets.items():
+        recipe.UVSetStage(name, steps)
+    recipe.Uvset({"Mode": "Delete", "Name": fileUVSet})
+    return recipe.SaveUVSets(outputPath or meshPath)
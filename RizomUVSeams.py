@@ -0,0 +1,109 @@
+import numpy as np
+
+def PolygonSides(data : dict) -> tuple:
+    """ Lists the sides of the 3D polygons, side k of a polygon going from its corner k to corner k + 1
+
+        returns:
+            (starts, ends, polygons, sides) arrays with one entry per polygon side: the
+            XYZ vertex IDs of both ends, the polygon ID and the side ID within the polygon.
+    """
+    sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+    corners = np.asarray(data["PolyXYZIDs"], dtype=np.int64)
+    firsts = np.cumsum(sizes) - sizes
+    following = np.arange(len(corners)) + 1
+    following[firsts + sizes - 1] = firsts
+    polygons = np.repeat(np.arange(len(sizes)), sizes)
+    sides = np.arange(len(corners)) - np.repeat(firsts, sizes)
+    return corners, corners[following], polygons, sides
+
+def PolygonNormals(data : dict) -> np.ndarray:
+    """ Unit normals of the 3D polygons (Newell's method, works for non planar polygons) """
+    xyz = np.asarray(data["CoordsXYZ"], dtype=np.float64).reshape(-1, 3)
+    starts, ends, polygons, _ = PolygonSides(data)
+    cross = np.cross(xyz[starts], xyz[ends])
+    normals = np.zeros((len(data["PolySizes"]), 3))
+    np.add.at(normals, polygons, cross)
+    return normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-300)
+
+def EdgeSides(data : dict) -> tuple:
+    """ Groups the polygon sides sharing the same two vertices into edges
+
+        returns:
+            (first, second) arrays with one entry per edge: the index of its first polygon
+            side in the PolygonSides arrays, and of its second one or -1 on borders. Sides
+            beyond the second one of non manifold edges are ignored.
+    """
+    starts, ends, _, _ = PolygonSides(data)
+    keys = np.minimum(starts, ends) * (int(max(starts.max(), ends.max())) + 1 if len(starts) else 1) + np.maximum(starts, ends)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    groupStarts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.append(groupStarts, len(keys)))
+    first = order[groupStarts]
+    second = np.where(counts > 1, order[np.minimum(groupStarts + 1, len(keys) - 1)], -1)
+    return first, second
+
+def FindSeams(data : dict, angle : float = None, polygonLabels : list = (), hardEdges : list = None) -> np.ndarray:
+    """ Finds the edges to cut from the 3D mesh and the edges and groups authored in the host application
+
+        A shared edge is a seam when:
+            - the angle between the normals of its two polygons is above angle (degrees),
+            - its polygons have different values in any of the polygonLabels arrays (one
+              value per polygon, e.g. material IDs or polygon selection tag membership),
+            - one of its polygon sides is in hardEdges (Phong breaks, hard edge selections),
+              given like the Select task "EdgesAsPolyEdgeIDs" IDs: [PolyID0, SideID0, ...].
+
+        Border edges are never returned, they don't need a cut.
+
+        returns:
+            A (seamCount, 2) array of [PolyID, SideID], one reference per seam edge.
+    """
+    _, _, polygons, sides = PolygonSides(data)
+    first, second = EdgeSides(data)
+    shared = second >= 0
+    first, second = first[shared], second[shared]
+    seams = np.zeros(len(first), dtype=bool)
+
+    if angle is not None:
+        normals = PolygonNormals(data)
+        cosines = np.einsum("ij,ij->i", normals[polygons[first]], normals[polygons[second]])
+        seams |= cosines < np.cos(np.radians(angle))
+
+    for labels in polygonLabels:
+        labels = np.asarray(labels)
+        seams |= labels[polygons[first]] != labels[polygons[second]]
+
+    if hardEdges is not None and len(hardEdges):
+        hard = np.asarray(hardEdges, dtype=np.int64).reshape(-1, 2)
+        sizes = np.asarray(data["PolySizes"], dtype=np.int64)
+        hard = hard[hard[:, 1] < sizes[hard[:, 0]]]
+        flags = np.zeros(len(polygons), dtype=bool)
+        flags[(np.cumsum(sizes) - sizes)[hard[:, 0]] + hard[:, 1]] = True
+        seams |= flags[first] | flags[second]
+
+    return np.stack([polygons[first[seams]], sides[first[seams]]], axis=1)
+
+def SeamSelectParams(seams : np.ndarray) -> dict:
+    """ Select task parameters selecting exactly the given [PolyID, SideID] edges """
+    return {
+        "PrimType": "Edge",
+        "List": True,
+        "Select": True,
+        "ResetBefore": True,
+        "EdgesAsPolyEdgeIDs": True,
+        "IDs": np.asarray(seams, dtype=np.int64).ravel().tolist(),
+    }
+
+def CutSeams(link, seams : np.ndarray):
+    """ Cuts the given [PolyID, SideID] edges of the loaded mesh with one Select and one Cut task """
+    if len(seams):
+        link.Select(SeamSelectParams(seams))
+        link.Cut({"PrimType": "Edge"})
+
+def SeamLua(seams : np.ndarray) -> str:
+    """ The ZomSelect and ZomCut lines doing CutSeams, for the scripts run with -cfi """
+    if not len(seams):
+        return ""
+    ids = ",".join(str(i) for i in np.asarray(seams, dtype=np.int64).ravel().tolist())
+    return ('ZomSelect({PrimType="Edge", List=true, Select=true, ResetBefore=true, EdgesAsPolyEdgeIDs=true, IDs={' + ids + '}})\n'
+            'ZomCut({PrimType="Edge"})\n')
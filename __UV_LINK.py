@@ -8,8 +8,19 @@
 
 import c4d
 import os
-import subprocess
 import json
+import math
+
+import uv_dedup
+import uv_jobs
+import uv_job_dialog
+import uv_templates
+
+# Wyznaczanie cięć z krawędzi siatki wymaga numpy; bez niego opcja EXPORT_EDGES jest pomijana
+try:
+    import RizomUVSeams
+except ImportError:
+    RizomUVSeams = None
 
 # --- Domyślne Ustawienia ---
 DEFAULT_SETTINGS = {
@@ -20,6 +31,9 @@ DEFAULT_SETTINGS = {
     "EXPORT_MATERIALS": False,
     "EXPORT_EDGES": False,
     "STRIP_UVS_BEFORE_EXPORT": False,
+    "SPLIT_SELECTION": False,
+    "MAX_PARALLEL_JOBS": 0,
+    "REUSE_DUPLICATE_UVS": False,
     "LAST_SCRIPT_NAME": ""
 }
 
@@ -40,6 +54,9 @@ ID_CHK_EXPORT_MATERIALS = 2007
 ID_CHK_EXPORT_EDGES = 2008
 ID_CHK_STRIP_UVS = 2009
 ID_BTN_SAVE_OPTIONS = 2010
+ID_CHK_SPLIT_SELECTION = 2011
+ID_NUM_MAX_PARALLEL_JOBS = 2012
+ID_CHK_REUSE_DUPLICATES = 2013
 ID_LST_SCRIPTS = 3001
 ID_BTN_RELOAD_SCRIPTS = 3002
 ID_BTN_NEW_SCRIPT = 3003
@@ -83,29 +100,14 @@ def save_settings():
 
 # --- Główne Funkcje Logiki ---
 
-def run_exchange_process(lua_script_content=""):
-    doc = c4d.documents.GetActiveDocument()
-    if not doc: return
-    
-    selected_objects = doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_CHILDREN | c4d.GETACTIVEOBJECTFLAGS_SELECTIONORDER)
-    if not selected_objects:
-        c4d.gui.MessageDialog("Żaden obiekt nie jest zaznaczony."); return
-
-    object_name = selected_objects[0].GetName()
-    
-    export_path = os.path.join(SETTINGS['EXPORT_PATH'], object_name + ".fbx")
-    if not os.path.exists(SETTINGS['EXPORT_PATH']):
-        try: os.makedirs(SETTINGS['EXPORT_PATH'])
-        except OSError as e:
-            c4d.gui.MessageDialog(f"Nie można utworzyć folderu eksportu:\n{SETTINGS['EXPORT_PATH']}\n\nBłąd: {e}"); return
-
-    temp_doc = c4d.documents.IsolateObjects(doc, selected_objects)
+def export_objects_to_fbx(doc, objects, export_path):
+    temp_doc = isolate_with_keys(doc, objects)
     if not temp_doc:
-        c4d.gui.MessageDialog("Błąd: Nie udało się wyizolować obiektów."); return
+        c4d.gui.MessageDialog("Błąd: Nie udało się wyizolować obiektów."); return False
 
     plug = c4d.plugins.FindPlugin(1026370, c4d.PLUGINTYPE_SCENESAVER)
     if not plug:
-        c4d.gui.MessageDialog("Nie znaleziono wtyczki eksportera FBX."); return
+        c4d.gui.MessageDialog("Nie znaleziono wtyczki eksportera FBX."); c4d.documents.KillDocument(temp_doc); return False
         
     op = {}
     if plug.Message(c4d.MSG_RETRIEVEPRIVATEDATA, op):
@@ -119,61 +121,348 @@ def run_exchange_process(lua_script_content=""):
             ### KRYTYCZNA POPRAWKA: Wyłączam przymusową triangulację ###
             fbx_settings[c4d.FBXEXPORT_TRIANGULATE] = False
         else:
-            c4d.gui.MessageDialog("Nie można uzyskać dostępu do ustawień eksportera FBX."); return
+            c4d.gui.MessageDialog("Nie można uzyskać dostępu do ustawień eksportera FBX."); c4d.documents.KillDocument(temp_doc); return False
 
     if not c4d.documents.SaveDocument(temp_doc, export_path, c4d.SAVEDOCUMENTFLAGS_DONTADDTORECENTLIST, 1026370):
-        c4d.gui.MessageDialog(f"BŁĄD!\n\nEksport obiektu '{object_name}' nie powiódł się."); c4d.documents.KillDocument(temp_doc); return
+        c4d.gui.MessageDialog(f"BŁĄD!\n\nEksport obiektu '{objects[0].GetName()}' nie powiódł się."); c4d.documents.KillDocument(temp_doc); return False
 
     c4d.documents.KillDocument(temp_doc)
+    return True
 
-    is_script_mode = bool(lua_script_content)
-    rizom_path = SETTINGS['RIZOMUV_PATH']
-    export_path_for_lua = export_path.replace("\\", "/")
-    command = [rizom_path]
-    
-    if is_script_mode:
+def build_rizom_command(export_path, lua_script_content="", script_name="_temp_run.lua", seam_lua="", name=""):
+    command = [SETTINGS['RIZOMUV_PATH']]
+    if not lua_script_content:
+        command.append(export_path); return command
+
+    # Szablon jest kompilowany raz (pamięć podręczna po skrócie treści), tu tylko podstawiamy parametry obiektu
+    template = uv_templates.compile_template(lua_script_content)
+    full_lua_script = template.render({
+        "path": export_path,
         # Sprawdź czy użytkownik chce wczytać bez UV
-        import_uvs = "true" if not SETTINGS.get("STRIP_UVS_BEFORE_EXPORT", False) else "false"
-        full_lua_script = f'ZomLoad({{File={{Path="{export_path_for_lua}", ImportUVs={import_uvs}}}}})\n'
-        # ... reszta logiki skryptowej ...
-        full_lua_script += lua_script_content + "\n"
-        full_lua_script += f'ZomSave({{File={{Path="{export_path_for_lua}"}}}})\n'
-        full_lua_script += 'ZomQuit()\n'
-        temp_script_path = os.path.join(PLUGIN_FOLDER, "_temp_run.lua")
-        with open(temp_script_path, 'w') as f: f.write(full_lua_script)
-        command.extend(["-cfi", temp_script_path])
-    else:
-        command.append(export_path)
+        "import_uvs": not SETTINGS.get("STRIP_UVS_BEFORE_EXPORT", False),
+        # Cięcia wyznaczone z krawędzi C4D idą przed skryptem użytkownika
+        "seams": seam_lua,
+        "name": name,
+    })
+    temp_script_path = os.path.join(PLUGIN_FOLDER, script_name)
+    with open(temp_script_path, 'w') as f: f.write(full_lua_script)
+    command.extend(["-cfi", temp_script_path])
+    return command
+
+# --- Eksport krawędzi jako cięć ---
+
+def find_object_seams(obj):
+    """Wyznacza krawędzie do cięcia obiektu jako pary [ID wielokąta, ID boku].
+
+    Cięciami są: krawędzie ostrzejsze niż limit kąta znacznika Phong, krawędzie
+    przerwania Phong (jeśli znacznik ich używa), granice znaczników zaznaczenia
+    wielokątów oraz granice materiałów przypisanych do tych zaznaczeń.
+    """
+    polygons = obj.GetAllPolygons()
+    count = len(polygons)
+    sizes, ids = [], []
+    for p in polygons:
+        if p.IsTriangle(): sizes.append(3); ids.extend((p.a, p.b, p.c))
+        else: sizes.append(4); ids.extend((p.a, p.b, p.c, p.d))
+    data = {"CoordsXYZ": [c for v in obj.GetAllPoints() for c in (v.x, v.y, v.z)], "PolySizes": sizes, "PolyXYZIDs": ids}
+
+    # Każdy znacznik zaznaczenia wielokątów dzieli siatkę na dwie grupy
+    labels, selections = [], {}
+    for tag in obj.GetTags():
+        if tag.CheckType(c4d.Tpolygonselection):
+            selections[tag.GetName()] = tag.GetBaseSelect().GetAll(count)
+            labels.append(selections[tag.GetName()])
+    # Materiały: późniejszy znacznik tekstury przykrywa wcześniejsze, jak w C4D
+    materials = [0] * count
+    for index, tag in enumerate(obj.GetTags()):
+        if not tag.CheckType(c4d.Ttexture): continue
+        restriction = tag[c4d.TEXTURETAG_RESTRICTION]
+        if not restriction: materials = [index + 1] * count
+        elif restriction in selections:
+            for i, selected in enumerate(selections[restriction]):
+                if selected: materials[i] = index + 1
+    labels.append(materials)
+
+    angle, hard_edges = None, None
+    phong = obj.GetTag(c4d.Tphong)
+    if phong:
+        if phong[c4d.PHONGTAG_PHONG_ANGLELIMIT]: angle = math.degrees(phong[c4d.PHONGTAG_PHONG_ANGLE])
+        if phong[c4d.PHONGTAG_PHONG_USEEDGES]:
+            # Krawędź i C4D to bok i % 4 wielokąta i // 4; w trójkącie bok 2 (c-d) nie istnieje, a bok 3 to c-a
+            hard_edges = []
+            for i, selected in enumerate(obj.GetPhongBreak().GetAll(count * 4)):
+                if not selected: continue
+                polygon, side = divmod(i, 4)
+                if sizes[polygon] == 3:
+                    if side == 2: continue
+                    if side == 3: side = 2
+                hard_edges.extend((polygon, side))
+    return RizomUVSeams.FindSeams(data, angle, labels, hard_edges)
+
+def build_seam_lua(objects):
+    """Zwraca polecenia LUA tnące krawędzie wszystkich obiektów jednym ZomSelect i ZomCut.
+
+    Wielokąty obiektów trafiają do FBX w kolejności listy, więc ID wielokątów kolejnych
+    obiektów są przesuwane o liczbę wielokątów poprzednich. N-gony są przy eksporcie
+    zapisywane inaczej niż w C4D, więc wtedy cięcia nie są eksportowane.
+    """
+    if not SETTINGS.get("EXPORT_EDGES", False): return ""
+    if RizomUVSeams is None:
+        print("Eksport krawędzi pominięty: brak modułu numpy."); return ""
+    seams, offset = [], 0
+    for obj in objects:
+        if not obj.IsInstanceOf(c4d.Opolygon) or obj.GetNgonCount():
+            print(f"Eksport krawędzi pominięty: '{obj.GetName()}' nie jest siatką bez n-gonów."); return ""
+        seams.extend([polygon + offset, side] for polygon, side in find_object_seams(obj).tolist())
+        offset += obj.GetPolygonCount()
+    print(f"Eksportuję {len(seams)} krawędzi jako cięcia.")
+    return RizomUVSeams.SeamLua(seams)
+
+def ensure_export_folder():
+    if os.path.exists(SETTINGS['EXPORT_PATH']): return True
+    try: os.makedirs(SETTINGS['EXPORT_PATH']); return True
+    except OSError as e:
+        c4d.gui.MessageDialog(f"Nie można utworzyć folderu eksportu:\n{SETTINGS['EXPORT_PATH']}\n\nBłąd: {e}"); return False
+
+def get_parallel_job_count():
+    max_jobs = SETTINGS.get("MAX_PARALLEL_JOBS", 0)
+    return max_jobs if max_jobs > 0 else (os.cpu_count() or 1)
+
+def run_exchange_process(lua_script_content=""):
+    doc = c4d.documents.GetActiveDocument()
+    if not doc: return
+    # Błędy szablonu zgłaszamy przed eksportem - później render dostaje już tylko wbudowane parametry
+    if lua_script_content:
+        try: uv_templates.compile_template(lua_script_content)
+        except uv_templates.TemplateError as e:
+            c4d.gui.MessageDialog(f"Błąd w szablonie skryptu:\n{e}"); return
+    
+    selected_objects = doc.GetActiveObjects(c4d.GETACTIVEOBJECTFLAGS_CHILDREN | c4d.GETACTIVEOBJECTFLAGS_SELECTIONORDER)
+    if not selected_objects:
+        c4d.gui.MessageDialog("Żaden obiekt nie jest zaznaczony."); return
+    if not ensure_export_folder(): return
 
+    duplicates = {}
+    if SETTINGS.get("REUSE_DUPLICATE_UVS", False):
+        selected_objects, duplicates = find_duplicate_objects(selected_objects)
+
+    # Tryb równoległy ma sens tylko w trybie skryptowym - RizomUV działa wtedy bez udziału użytkownika
+    if lua_script_content and SETTINGS.get("SPLIT_SELECTION", False) and len(selected_objects) > 1:
+        run_parallel_exchange(doc, selected_objects, duplicates, lua_script_content); return
+
+    object_name = selected_objects[0].GetName()
+    export_path = os.path.join(SETTINGS['EXPORT_PATH'], object_name + ".fbx")
+    if not export_objects_to_fbx(doc, selected_objects, export_path): return
+
+    seam_lua = build_seam_lua(selected_objects) if lua_script_content else ""
+    command = build_rizom_command(export_path, lua_script_content, seam_lua=seam_lua, name=object_name)
+    runner = uv_jobs.UVJobRunner(1)
+    runner.submit(uv_jobs.UVJob(object_name, lambda job: uv_jobs.run_process(job, command),
+                                lambda job: apply_job_result(doc, job, selected_objects, export_path, duplicates)))
+    uv_job_dialog.open_job_dialog(runner, "RizomUV", report_failed_jobs)
+
+def run_parallel_exchange(doc, selected_objects, duplicates, lua_script_content):
+    """Rozwija każdy zaznaczony obiekt osobno, w kilku instancjach RizomUV jednocześnie.
+
+    Każdy obiekt trafia do własnego pliku FBX i własnej instancji uruchamianej skryptem.
+    Potomkowie zaznaczonego obiektu są eksportowani razem z nim (IsolateObjects kopiuje
+    hierarchię), więc trafiają do zadania swojego przodka zamiast do osobnego.
+    Liczba jednocześnie działających instancji to MAX_PARALLEL_JOBS (0 = liczba rdzeni).
+    Wynik każdego zadania jest nanoszony na scenę zaraz po jego zakończeniu, a zaznaczenie
+    jest ustawiane raz, na wszystkie zaktualizowane obiekty, po zakończeniu ostatniego.
+    """
+    groups = group_by_selected_ancestor(selected_objects)
+    runner = uv_jobs.UVJobRunner(get_parallel_job_count())
+    updated = []
+    for i, objects in enumerate(groups):
+        name = objects[0].GetName()
+        export_path = os.path.join(SETTINGS['EXPORT_PATH'], f"{name}_{i}.fbx")
+        if not export_objects_to_fbx(doc, objects, export_path): runner.cancel_all(); return
+        command = build_rizom_command(export_path, lua_script_content, f"_temp_run_{i}.lua", build_seam_lua(objects), name)
+        runner.submit(uv_jobs.UVJob(name, lambda job, command=command: uv_jobs.run_process(job, command),
+                                    lambda job, objects=objects, path=export_path: updated.extend(apply_job_result(doc, job, objects, path, duplicates, select=False))))
+
+    def on_finished(jobs):
+        select_objects(doc, updated); report_failed_jobs(jobs)
+
+    print(f"Rozwijam {len(groups)} obiektów w maks. {runner.max_workers} instancjach RizomUV...")
+    uv_job_dialog.open_job_dialog(runner, "RizomUV - rozwijanie równoległe", on_finished)
+
+def group_by_selected_ancestor(objects):
+    """Dzieli obiekty na grupy [przodek, jego zaznaczeni potomkowie...] w kolejności listy.
+
+    GETACTIVEOBJECTFLAGS_CHILDREN zwraca też dzieci zaznaczonych obiektów, a te są już
+    w FBX swojego przodka, więc nie mogą dostać osobnego zadania.
+    """
+    selected = set(objects)
+    groups, group_of = [], {}
+    for obj in objects:
+        ancestor = obj.GetUp()
+        while ancestor and ancestor not in selected: ancestor = ancestor.GetUp()
+        if ancestor: group_of[obj] = group_of[ancestor]; group_of[obj].append(obj)
+        else: group_of[obj] = [obj]; groups.append(group_of[obj])
+    return groups
+
+def select_objects(doc, objects):
+    objects = [obj for obj in objects if obj.IsAlive()]
+    for i, obj in enumerate(objects):
+        doc.SetActiveObject(obj, c4d.SELECTION_NEW if i == 0 else c4d.SELECTION_ADD)
+    if objects: c4d.EventAdd()
+
+def apply_job_result(doc, job, objects, export_path, duplicates, select=True):
+    if job.result != 0:
+        job.state = uv_jobs.FAILED; job.error = f"kod wyjścia RizomUV: {job.result}"; return []
+    return apply_uvs_in_place(doc, objects, export_path, duplicates, select)
+
+def report_failed_jobs(jobs):
+    failed = [f"{job.name}: {job.error}" for job in jobs if job.state == uv_jobs.FAILED]
+    if failed:
+        c4d.gui.MessageDialog("RizomUV zakończył się błędem dla obiektów:\n" + "\n".join(failed))
+
+# --- Import UV z powrotem na obiekty źródłowe ---
+
+# Prefiks nazw nadawanych obiektom w eksportowanym FBX. Nazwa "RUV00012" to indeks
+# obiektu w liście zaznaczenia, więc po powrocie z RizomUV dopasowanie jest jednoznaczne.
+EXPORT_KEY_PREFIX = "RUV"
+
+def make_export_key(index):
+    return f"{EXPORT_KEY_PREFIX}{index:05d}"
+
+def isolate_with_keys(doc, objects):
+    """Izoluje obiekty do tymczasowego dokumentu, nadając kopiom stabilne klucze jako nazwy.
+
+    Nazwy oryginałów są zmieniane tylko na czas kopiowania (bez wpisu w historii Undo)
+    i przywracane od razu, więc scena nie zostaje zmieniona.
+    """
+    original_names = [obj.GetName() for obj in objects]
+    for i, obj in enumerate(objects): obj.SetName(make_export_key(i))
     try:
-        process = subprocess.Popen(command)
-        process.wait()
-    except Exception as e:
-        c4d.gui.MessageDialog(f"Błąd podczas uruchamiania RizomUV: {e}"); return
+        return c4d.documents.IsolateObjects(doc, objects)
+    finally:
+        for obj, name in zip(objects, original_names): obj.SetName(name)
+
+def iter_hierarchy(obj):
+    # Iteracyjne przejście po hierarchii (bez rekurencji - głębokie sceny nie przepełnią stosu)
+    while obj:
+        yield obj
+        down = obj.GetDown()
+        if down: obj = down; continue
+        while obj and not obj.GetNext(): obj = obj.GetUp()
+        if obj: obj = obj.GetNext()
+
+def find_returned_meshes(returned_doc):
+    returned = {}
+    for obj in iter_hierarchy(returned_doc.GetFirstObject()):
+        name = obj.GetName()
+        if name.startswith(EXPORT_KEY_PREFIX) and obj.IsInstanceOf(c4d.Opolygon): returned[name] = obj
+    return returned
+
+def can_copy_uvw_tag(src_tag, dst_obj):
+    dst_tag = dst_obj.GetTag(c4d.Tuvw)
+    return dst_tag is None or dst_tag.GetDataCount() == src_tag.GetDataCount()
+
+def copy_uvw_tag(doc, src_tag, dst_obj):
+    """Kopiuje dane UVW do znacznika UVW obiektu docelowego (tworzy go, jeśli brak)."""
+    if not can_copy_uvw_tag(src_tag, dst_obj): return False
+    dst_tag = dst_obj.GetTag(c4d.Tuvw)
+    if dst_tag is None:
+        dst_tag = src_tag.GetClone()
+        dst_obj.InsertTag(dst_tag); doc.AddUndo(c4d.UNDOTYPE_NEW, dst_tag)
+        return True
+    src_data = src_tag.GetLowlevelDataAddressR()
+    doc.AddUndo(c4d.UNDOTYPE_CHANGE, dst_tag)
+    dst_tag.GetLowlevelDataAddressW()[:] = src_data
+    dst_tag.Message(c4d.MSG_UPDATE)
+    return True
+
+def apply_uvs_in_place(doc, selected_objects, export_path, duplicates=None, select=True):
+    """Nanosi UV zwrócone przez RizomUV na obiekty źródłowe w jednym kroku Undo.
 
+    Zwrócony FBX jest wczytywany do osobnego dokumentu, a siatki są dopasowywane
+    do oryginałów po kluczu nadanym w isolate_with_keys. Zmieniany jest tylko znacznik
+    UVW, więc pozostałe znaczniki, materiały i odwołania do obiektu zostają nietknięte.
+    Koszt zależy od liczby przetwarzanych obiektów, a nie od wielkości sceny.
+    Wywoływane w wątku głównym; obiekty usunięte w trakcie pracy RizomUV są pomijane.
+    Obiekty, które nie są siatkami, są zastępowane zwróconą siatką (merge_returned_mesh).
+
+    duplicates - słownik {reprezentant: [duplikaty]} z find_duplicate_objects; duplikaty
+    dostają te same UV co ich reprezentant.
+    select - zaznacza zaktualizowane obiekty (tryb równoległy zaznacza je sam, raz na końcu).
+    """
+    if not doc.IsAlive(): return []
+    returned_doc = c4d.documents.LoadDocument(export_path, c4d.SCENEFILTER_OBJECTS, None)
+    if not returned_doc:
+        c4d.gui.MessageDialog(f"Nie można wczytać pliku zwróconego przez RizomUV:\n{export_path}"); return []
+    returned = find_returned_meshes(returned_doc)
+
+    updated, skipped = [], []
     doc.StartUndo()
-    if not SETTINGS['KEEP_ORIGINAL']:
-        for obj in selected_objects:
-            doc.AddUndo(c4d.UNDOTYPE_DELETE, obj); obj.Remove()
+    try:
+        for i, obj in enumerate(selected_objects):
+            if not obj.IsAlive(): continue
+            src = returned.get(make_export_key(i))
+            src_tag = src.GetTag(c4d.Tuvw) if src else None
+            for target_obj in [obj] + (duplicates or {}).get(obj, []):
+                if not target_obj.IsAlive(): continue
+                if src_tag is None: skipped.append(target_obj.GetName()); continue
+                if not target_obj.IsInstanceOf(c4d.Opolygon):
+                    updated.append(merge_returned_mesh(doc, src, target_obj)); continue
+                # Kopia z KEEP_ORIGINAL ma znacznik oryginału, więc sprawdzamy go przed jej utworzeniem
+                if src.GetPolygonCount() != target_obj.GetPolygonCount() or not can_copy_uvw_tag(src_tag, target_obj):
+                    skipped.append(target_obj.GetName()); continue
+                target = target_obj
+                if SETTINGS['KEEP_ORIGINAL']:
+                    target = target_obj.GetClone(c4d.COPYFLAGS_NO_HIERARCHY)
+                    target.SetName(target_obj.GetName() + SETTINGS['SUFFIX'])
+                    target.InsertAfter(target_obj); doc.AddUndo(c4d.UNDOTYPE_NEW, target)
+                copy_uvw_tag(doc, src_tag, target); updated.append(target)
+        if select:
+            for i, obj in enumerate(updated):
+                doc.SetActiveObject(obj, c4d.SELECTION_NEW if i == 0 else c4d.SELECTION_ADD)
+    finally:
+        doc.EndUndo()
+        c4d.documents.KillDocument(returned_doc)
+    c4d.EventAdd()
 
-    objects_before_merge = set(doc.GetObjects())
-    c4d.documents.MergeDocument(doc, export_path, c4d.SCENEFILTER_OBJECTS | c4d.SCENEFILTER_MATERIALS, None)
-    objects_after_merge = set(doc.GetObjects())
-    newly_added_objects = list(objects_after_merge - objects_before_merge)
+    if skipped:
+        print("Pominięto obiekty (brak UV lub zmieniona topologia): " + ", ".join(skipped))
+    return updated
 
-    if not newly_added_objects: doc.EndUndo(); return
+def merge_returned_mesh(doc, src, source_obj):
+    """Wstawia zwróconą siatkę w miejsce obiektu, który nie jest siatką (generatory, prymitywy).
 
-    final_object = None
-    for new_obj in newly_added_objects:
-        if new_obj.IsInstanceOf(c4d.Ocamera): new_obj.Remove()
-        else:
-            if not final_object:
-                final_object = new_obj; doc.AddUndo(c4d.UNDOTYPE_NEW, final_object)
-    if final_object:
-        base_name = final_object.GetName().replace(".fbx", "")
-        doc.AddUndo(c4d.UNDOTYPE_CHANGE, final_object); final_object.SetName(base_name + SETTINGS['SUFFIX'])
-        doc.SetActiveObject(final_object, c4d.SELECTION_NEW)
-    doc.EndUndo(); c4d.EventAdd()
+    Takiego obiektu nie da się zaktualizować w miejscu, więc jak dawniej trafia do sceny
+    nowy obiekt z UV, a oryginał jest usuwany, chyba że włączono KEEP_ORIGINAL.
+    """
+    mesh = src.GetClone(c4d.COPYFLAGS_NO_HIERARCHY)
+    mesh.SetName(source_obj.GetName() + SETTINGS['SUFFIX'])
+    mesh.InsertAfter(source_obj); mesh.SetMg(src.GetMg())
+    doc.AddUndo(c4d.UNDOTYPE_NEW, mesh)
+    if not SETTINGS['KEEP_ORIGINAL']:
+        # Dzieci przechodzą pod nową siatkę (ta sama macierz globalna), żeby nie zniknęły z rodzicem
+        for child in source_obj.GetChildren():
+            doc.AddUndo(c4d.UNDOTYPE_CHANGE, child); child.InsertUnderLast(mesh)
+        doc.AddUndo(c4d.UNDOTYPE_DELETE, source_obj); source_obj.Remove()
+    return mesh
+
+def find_duplicate_objects(objects):
+    """Dzieli obiekty na reprezentantów i ich duplikaty (ta sama siatka, dowolna transformacja).
+
+    Zwraca (reprezentanci, {reprezentant: [duplikaty]}). Do RizomUV trafiają tylko reprezentanci.
+    """
+    fingerprints = []
+    for obj in objects:
+        fingerprint = None
+        if obj.IsInstanceOf(c4d.Opolygon):
+            points = [(p.x, p.y, p.z) for p in obj.GetAllPoints()]
+            polygons = [(q.a, q.b, q.c, q.d) for q in obj.GetAllPolygons()]
+            fingerprint = uv_dedup.mesh_fingerprint(points, polygons)
+        fingerprints.append((obj, fingerprint))
+    groups = uv_dedup.group_duplicates(fingerprints)
+    duplicates = {group[0]: group[1:] for group in groups if len(group) > 1}
+    if duplicates:
+        print(f"Duplikaty: {len(objects)} obiektów -> {len(groups)} do rozwinięcia w RizomUV")
+    return [group[0] for group in groups], duplicates
 
 # --- Klasy Okien Dialogowych (GUI) ---
 
@@ -191,6 +480,9 @@ class OptionsDialog(c4d.gui.GeDialog):
         self.AddCheckbox(ID_CHK_EXPORT_MATERIALS, c4d.BFH_LEFT, 0, 0, name="Eksportuj materiały")
         self.AddCheckbox(ID_CHK_EXPORT_EDGES, c4d.BFH_LEFT, 0, 0, name="Eksportuj krawędzie jako cięcia (tryb skryptowy)")
         self.AddCheckbox(ID_CHK_STRIP_UVS, c4d.BFH_LEFT, 0, 0, name="Wczytywaj bez mapy UV (zacznij od nowa)")
+        self.AddCheckbox(ID_CHK_SPLIT_SELECTION, c4d.BFH_LEFT, 0, 0, name="Rozwijaj obiekty osobno, równolegle (tryb skryptowy)")
+        self.AddCheckbox(ID_CHK_REUSE_DUPLICATES, c4d.BFH_LEFT, 0, 0, name="Rozwijaj identyczne siatki tylko raz (kopiuj UV na duplikaty)")
+        self.GroupBegin(0, c4d.BFH_SCALEFIT, 2, 0); self.AddStaticText(0, c4d.BFH_LEFT, name="Maks. liczba instancji (0 = liczba rdzeni)"); self.AddEditNumberArrows(ID_NUM_MAX_PARALLEL_JOBS, c4d.BFH_LEFT); self.GroupEnd()
         self.AddSeparatorH(c4d.BFH_SCALEFIT)
         self.AddButton(ID_BTN_SAVE_OPTIONS, c4d.BFH_CENTER, name="Zapisz i Zamknij")
         self.GroupEnd()
@@ -203,6 +495,9 @@ class OptionsDialog(c4d.gui.GeDialog):
         self.SetBool(ID_CHK_EXPORT_MATERIALS, SETTINGS.get("EXPORT_MATERIALS", False))
         self.SetBool(ID_CHK_EXPORT_EDGES, SETTINGS.get("EXPORT_EDGES", False))
         self.SetBool(ID_CHK_STRIP_UVS, SETTINGS.get("STRIP_UVS_BEFORE_EXPORT", False))
+        self.SetBool(ID_CHK_SPLIT_SELECTION, SETTINGS.get("SPLIT_SELECTION", False))
+        self.SetBool(ID_CHK_REUSE_DUPLICATES, SETTINGS.get("REUSE_DUPLICATE_UVS", False))
+        self.SetInt32(ID_NUM_MAX_PARALLEL_JOBS, SETTINGS.get("MAX_PARALLEL_JOBS", 0), min=0, max=64)
         return True
     def Command(self, id, msg):
         if id == ID_BTN_FIND_RIZOM:
@@ -221,6 +516,9 @@ class OptionsDialog(c4d.gui.GeDialog):
             SETTINGS["EXPORT_MATERIALS"] = self.GetBool(ID_CHK_EXPORT_MATERIALS)
             SETTINGS["EXPORT_EDGES"] = self.GetBool(ID_CHK_EXPORT_EDGES)
             SETTINGS["STRIP_UVS_BEFORE_EXPORT"] = self.GetBool(ID_CHK_STRIP_UVS)
+            SETTINGS["SPLIT_SELECTION"] = self.GetBool(ID_CHK_SPLIT_SELECTION)
+            SETTINGS["MAX_PARALLEL_JOBS"] = self.GetInt32(ID_NUM_MAX_PARALLEL_JOBS)
+            SETTINGS["REUSE_DUPLICATE_UVS"] = self.GetBool(ID_CHK_REUSE_DUPLICATES)
             if save_settings(): print("Ustawienia zostały zapisane.")
             self.Close(); return True
         return True
@@ -253,6 +551,8 @@ class ScriptManagerDialog(c4d.gui.GeDialog): # Ta klasa pozostaje bez zmian
         elif id == ID_BTN_RUN_SCRIPT:
             script_content = self.GetString(ID_TXT_SCRIPT_EDITOR)
             if not script_content.strip(): c4d.gui.MessageDialog("Edytor skryptu jest pusty."); return True
+            try: uv_templates.compile_template(script_content)
+            except uv_templates.TemplateError as e: c4d.gui.MessageDialog(f"Błąd w szablonie skryptu:\n{e}"); return True
             script_id = self.GetInt32(ID_LST_SCRIPTS)
             SETTINGS['LAST_SCRIPT_NAME'] = self.GetString(ID_LST_SCRIPTS, script_id) if script_id > 0 else ""
             save_settings(); self.Close(); run_exchange_process(lua_script_content=script_content)
@@ -0,0 +1,25 @@
+import os
+import sys
+import types
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The rizomuvlink native module only loads on Windows. Elsewhere the tests register a
+# module with its error class only: they use fake links and stand-in servers, never
+# the native connection object.
+try:
+    import win
+except BaseException:
+    class ZEx(Exception):
+        pass
+
+    class RizomUVLinkPyd:
+        def __init__(self):
+            raise ZEx("rizomuvlink is not available on this platform")
+
+    rizomuvlink = types.ModuleType("win.rizomuvlink")
+    rizomuvlink.ZEx, rizomuvlink.RizomUVLinkPyd = ZEx, RizomUVLinkPyd
+    win = types.ModuleType("win")
+    win.rizomuvlink = rizomuvlink
+    sys.modules["win"], sys.modules["win.rizomuvlink"] = win, rizomuvlink
@@ -0,0 +1,28 @@
+import queue
+import types
+
+import pytest
+
+from RizomUVLinkMetrics import CMetricsRegistry
+
+def FakePool():
+    return types.SimpleNamespace(links=[], idle=queue.Queue(), waiting=0, restartCount=0, spawnErrorCount=0, spawnListeners=[])
+
+def test_duplicate_name_raises():
+    registry = CMetricsRegistry()
+    registry.Gauge("a", "first")
+    with pytest.raises(ValueError):
+        registry.Gauge("a", "second")
+
+def test_pools_are_reported_separately():
+    registry = CMetricsRegistry()
+    first, second = FakePool(), FakePool()
+    first.waiting, second.waiting = 1, 2
+    registry.InstrumentPool(first)
+    with pytest.raises(ValueError):
+        registry.InstrumentPool(second)
+    registry = CMetricsRegistry()
+    registry.InstrumentPool(first, "pack_pool")
+    registry.InstrumentPool(second, "raster_pool")
+    text = registry.Render()
+    assert "rizomuv_pack_pool_waiting 1.0" in text and "rizomuv_raster_pool_waiting 2.0" in text
@@ -0,0 +1,33 @@
+import numpy as np
+
+import RizomUVPacking
+
+def Squares(corners : list) -> dict:
+    """ One unit square island per lower left UV corner """
+    uvw = [c for u, v in corners for c in (u, v, 0, u + 1, v, 0, u + 1, v + 1, 0, u, v + 1, 0)]
+    return {
+        "CoordsUVW": uvw,
+        "PolySizes": [4] * len(corners),
+        "PolyUVWIDs": list(range(4 * len(corners))),
+        "PolygonIDsToIslandIDs": list(range(len(corners))),
+    }
+
+def test_udim_tiles():
+    assert RizomUVPacking.UDIMTile(1001) == (0, 0)
+    assert RizomUVPacking.UDIMTile(1023) == (2, 2)
+
+def test_assign_islands_by_center():
+    tiles = RizomUVPacking.AssignIslandsToTiles(Squares([(0, 0), (1, 0), (2, 3)]))
+    assert tiles == {1001: [0], 1002: [1], 1033: [2]}
+
+def test_assign_islands_outside_udim_range():
+    # centers at u = 10.5, u = -0.5 and v = -1.5 go to the nearest tile instead of wrapping
+    tiles = RizomUVPacking.AssignIslandsToTiles(Squares([(10, 0), (-1, 0), (3, -2)]))
+    assert tiles == {1010: [0], 1001: [1], 1004: [2]}
+    assert all(RizomUVPacking.UDIMTile(udim)[1] >= 0 for udim in tiles)
+
+def test_assign_islands_by_area():
+    data = Squares([(0, 0), (1, 0), (2, 0), (3, 0)])
+    tiles = RizomUVPacking.AssignIslandsToTiles(data, tileCount=2)
+    assert sorted(len(islands) for islands in tiles.values()) == [2, 2]
+    assert sorted(np.concatenate(list(tiles.values())).tolist()) == [0, 1, 2, 3]
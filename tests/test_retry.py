@@ -0,0 +1,91 @@
+from contextlib import contextmanager
+
+import pytest
+
+import RizomUVLinkRetry
+from RizomUVLinkResults import CZTransportEx, CZInputEx
+from RizomUVLinkRetry import CRetryPolicy, IsIdempotent, RunRecipe
+from RizomUVRecipe import CRizomUVRecipe
+
+class CFlakyLink:
+    """ Records the tasks and raises CZTransportEx on its first `failures` tasks """
+    def __init__(self, failures : int = 0):
+        self.failures = failures
+        self.calls = []
+        self.abandoned = False
+
+    def Run(self, task, params = {}):
+        self.calls.append(task)
+        if self.failures > 0:
+            self.failures -= 1
+            raise CZTransportEx("no answer", task)
+        return task
+
+class CFakePool:
+    """ Hands out the given links in turn, like CRizomUVLinkPool.Session """
+    def __init__(self, links : list):
+        self.links = list(links)
+        self.released = []
+
+    @contextmanager
+    def Session(self):
+        link = self.links.pop(0)
+        try:
+            yield link
+        finally:
+            self.released.append(link)
+
+@pytest.mark.parametrize("params", [{"File": {"Path": "a.fbx"}}, {"File.Path": "a.fbx"}])
+def test_load_file_is_idempotent(params):
+    assert IsIdempotent("Load", params)
+
+@pytest.mark.parametrize("params", [{"Data": {"PolySizes": [3], "CoordsUVW": []}}, {"Data.PolySizes": [3], "Data.CoordsUVW": []}])
+def test_load_full_data_is_idempotent(params):
+    assert IsIdempotent("Load", params)
+
+def test_partial_updates_are_not_idempotent():
+    assert not IsIdempotent("Load", {"Data": {"CoordsUVW": [0.0]}})
+    assert not IsIdempotent("Load", {"Data.CoordsUVW": [0.0]})
+    assert not IsIdempotent("Pack", {})
+    assert IsIdempotent("Select", {"ResetBefore": True}) and not IsIdempotent("Select", {})
+    assert IsIdempotent("Uvset", {"Mode": "SetCurrent"}) and not IsIdempotent("Uvset", {"Mode": "Copy"})
+
+def test_delay_bounds():
+    policy = CRetryPolicy(baseDelay=0.5, maxDelay=3.0, multiplier=2.0, jitter=0.1)
+    for attempt, delay in enumerate([0.5, 1.0, 2.0, 3.0, 3.0]):
+        for _ in range(20):
+            assert delay <= policy.Delay(attempt) <= delay * 1.1
+
+def test_call_retries(monkeypatch):
+    monkeypatch.setattr(RizomUVLinkRetry.time, "sleep", lambda seconds: None)
+    link, retries = CFlakyLink(failures=2), []
+    policy = CRetryPolicy(attempts=3)
+    assert policy.Call(lambda: link.Run("Save"), lambda attempt, error: retries.append(attempt)) == "Save"
+    assert link.calls == ["Save"] * 3 and retries == [0, 1]
+
+    link = CFlakyLink(failures=3)
+    with pytest.raises(CZTransportEx):
+        policy.Call(lambda: link.Run("Save"))
+    assert len(link.calls) == 3
+
+def test_call_does_not_retry_other_errors():
+    calls = []
+    def fail():
+        calls.append(1)
+        raise CZInputEx("bad file")
+    with pytest.raises(CZInputEx):
+        CRetryPolicy(attempts=3).Call(fail)
+    assert calls == [1]
+
+def test_run_recipe_replays_on_a_fresh_instance(monkeypatch):
+    monkeypatch.setattr(RizomUVLinkRetry.time, "sleep", lambda seconds: None)
+    recipe = CRizomUVRecipe().Load({"File.Path": "a.fbx"}).Pack({})
+    broken, healthy = CFlakyLink(failures=1), CFlakyLink()
+    pool = CFakePool([broken, healthy])
+    assert RunRecipe(pool, recipe, CRetryPolicy(attempts=2)) == ["Load", "Pack"]
+    assert broken.abandoned and not healthy.abandoned
+    assert pool.released == [broken, healthy]
+
+def test_run_recipe_requires_a_load():
+    with pytest.raises(Exception):
+        RunRecipe(CFakePool([]), CRizomUVRecipe().Pack({}))
@@ -0,0 +1,117 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from RizomUVLinkBase import CZEx
+from RizomUVLinkScheduler import CRizomUVLinkScheduler, PENDING, RUNNING, DONE, FAILED
+
+CLASSES = {
+    "Interactive": {"Priority": 0, "Reserved": 0, "Preemptible": False},
+    "Batch": {"Priority": 10, "Reserved": 0, "Preemptible": True},
+}
+
+class CFakeLink:
+    def __init__(self, cancelToken):
+        self.cancelToken = cancelToken
+
+    def Work(self, seconds : float):
+        """ A task of the given duration that stops as soon as the session token is cancelled """
+        if self.cancelToken is not None:
+            self.cancelToken.event.wait(seconds)
+            self.cancelToken.Check()
+        else:
+            time.sleep(seconds)
+
+class CFakePool:
+    """ The members of CRizomUVLinkPool used by the scheduler, without instances """
+    def __init__(self, size : int):
+        self.size = size
+        self.restarting = 0
+        self.spawnListeners = []
+
+    def LiveCount(self) -> int:
+        return self.size - self.restarting
+
+    @contextmanager
+    def Session(self, timeout : float = None, cancelToken = None):
+        yield CFakeLink(cancelToken)
+
+def WaitFor(condition, timeout : float = 5.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        time.sleep(0.01)
+
+@pytest.fixture
+def scheduler(request):
+    size, classes = getattr(request, "param", (1, CLASSES))
+    scheduler = CRizomUVLinkScheduler(CFakePool(size), classes)
+    yield scheduler
+    scheduler.Close(cancelRunning=True)
+
+def test_interactive_preempts_batch(scheduler):
+    starts = []
+    def batch(link):
+        starts.append("batch")
+        if len(starts) == 1:
+            link.Work(10.0)
+        return "batch"
+    batchJob = scheduler.Submit(batch, "Batch")
+    WaitFor(lambda: batchJob.state == RUNNING)
+    interactive = scheduler.Submit(lambda link: starts.append("interactive") or "interactive", "Interactive")
+    assert interactive.Result(5) == "interactive"
+    assert batchJob.Result(5) == "batch"
+    assert starts == ["batch", "interactive", "batch"]
+    assert batchJob.preemptionCount == 1 and batchJob.state == DONE
+
+def test_preempted_job_keeps_its_place(scheduler):
+    starts = []
+    def first(link):
+        starts.append("first")
+        if starts.count("first") == 1:
+            link.Work(10.0)
+    firstJob = scheduler.Submit(first, "Batch")
+    WaitFor(lambda: firstJob.state == RUNNING)
+    secondJob = scheduler.Submit(lambda link: starts.append("second"), "Batch")
+    interactive = scheduler.Submit(lambda link: starts.append("interactive"), "Interactive")
+    for job in (interactive, firstJob, secondJob):
+        job.Result(5)
+    # the preempted job goes back ahead of the batch job submitted after it
+    assert starts == ["first", "interactive", "first", "second"]
+
+def test_pending_job_expires(scheduler):
+    blocker = scheduler.Submit(lambda link: link.Work(10.0), "Interactive")
+    WaitFor(lambda: blocker.state == RUNNING)
+    start = time.monotonic()
+    late = scheduler.Submit(lambda link: None, "Interactive", deadline=0.1)
+    with pytest.raises(CZEx):
+        late.Result(5)
+    assert late.state == FAILED and time.monotonic() - start < 2.0
+
+@pytest.mark.parametrize("scheduler", [(2, dict(CLASSES, Interactive=dict(CLASSES["Interactive"], Reserved=1)))], indirect=True)
+def test_reserved_capacity_blocks_batch(scheduler):
+    release = threading.Event()
+    first = scheduler.Submit(lambda link: release.wait(5), "Batch")
+    second = scheduler.Submit(lambda link: release.wait(5), "Batch")
+    WaitFor(lambda: first.state == RUNNING)
+    time.sleep(0.1)
+    # the second instance is kept for the interactive class
+    assert second.state == PENDING
+    interactive = scheduler.Submit(lambda link: "interactive", "Interactive")
+    assert interactive.Result(5) == "interactive"
+    assert second.state == PENDING
+    release.set()
+    first.Result(5); second.Result(5)
+    assert second.state == DONE
+
+def test_restarting_instances_are_not_free(scheduler):
+    scheduler.pool.restarting = 1
+    job = scheduler.Submit(lambda link: "done", "Interactive")
+    time.sleep(0.1)
+    assert job.state == PENDING
+    scheduler.pool.restarting = 0
+    for listener in scheduler.pool.spawnListeners:
+        listener(None)
+    assert job.Result(5) == "done"
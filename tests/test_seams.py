@@ -0,0 +1,47 @@
+import numpy as np
+
+import RizomUVSeams
+
+def Cube() -> dict:
+    points = [(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)]
+    faces = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+    return {"CoordsXYZ": np.ravel(points).tolist(), "PolySizes": [4] * 6, "PolyXYZIDs": np.ravel(faces).tolist()}
+
+class CRecordingLink:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, task):
+        return lambda params = {}: self.calls.append((task, params))
+
+def test_find_seams():
+    cube = Cube()
+    assert len(RizomUVSeams.FindSeams(cube, angle=30.0)) == 12
+    assert len(RizomUVSeams.FindSeams(cube, angle=100.0)) == 0
+    assert len(RizomUVSeams.FindSeams(cube, polygonLabels=[[0, 0, 0, 0, 1, 1]])) == 8
+    assert RizomUVSeams.FindSeams(cube, hardEdges=[0, 0, 0, 1]).tolist() == [[0, 0], [0, 1]]
+
+def test_select_params():
+    params = RizomUVSeams.SeamSelectParams(np.array([[0, 0], [3, 2]]))
+    assert params == {
+        "PrimType": "Edge",
+        "List": True,
+        "Select": True,
+        "ResetBefore": True,
+        "EdgesAsPolyEdgeIDs": True,
+        "IDs": [0, 0, 3, 2],
+    }
+
+def test_cut_seams():
+    link = CRecordingLink()
+    RizomUVSeams.CutSeams(link, np.array([[1, 3]]))
+    assert link.calls == [("Select", RizomUVSeams.SeamSelectParams(np.array([[1, 3]]))), ("Cut", {"PrimType": "Edge"})]
+    link = CRecordingLink()
+    RizomUVSeams.CutSeams(link, np.zeros((0, 2), dtype=np.int64))
+    assert link.calls == []
+
+def test_seam_lua():
+    assert RizomUVSeams.SeamLua(np.array([[0, 0], [3, 2]])) == (
+        'ZomSelect({PrimType="Edge", List=true, Select=true, ResetBefore=true, EdgesAsPolyEdgeIDs=true, IDs={0,0,3,2}})\n'
+        'ZomCut({PrimType="Edge"})\n')
+    assert RizomUVSeams.SeamLua([]) == ""
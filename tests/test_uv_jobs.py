@@ -0,0 +1,139 @@
+import importlib
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import uv_jobs
+
+def wait_delivered(runner, timeout=10.0):
+    end = time.monotonic() + timeout
+    finished = []
+    while not runner.idle:
+        assert time.monotonic() < end, "zadania nie zakończyły się na czas"
+        finished += runner.poll()
+        time.sleep(0.01)
+    return finished
+
+def test_job_done():
+    runner, delivered = uv_jobs.UVJobRunner(2), []
+    job = runner.submit(uv_jobs.UVJob("a", lambda job: 0, delivered.append))
+    assert wait_delivered(runner) == [job]
+    assert job.state == uv_jobs.DONE and job.result == 0 and delivered == [job]
+    assert runner.progress() == (1, 1)
+
+def test_job_failure():
+    def work(job): raise RuntimeError("boom")
+    runner, delivered = uv_jobs.UVJobRunner(1), []
+    job = runner.submit(uv_jobs.UVJob("a", work, delivered.append))
+    wait_delivered(runner)
+    assert job.state == uv_jobs.FAILED and str(job.error) == "boom" and delivered == [job]
+
+def test_cancel_pending_and_running():
+    started, release = threading.Event(), threading.Event()
+    def work(job):
+        started.set(); release.wait(5); job.check_cancelled()
+    runner, delivered = uv_jobs.UVJobRunner(1), []
+    running = runner.submit(uv_jobs.UVJob("running", work, delivered.append))
+    pending = runner.submit(uv_jobs.UVJob("pending", lambda job: 0, delivered.append))
+    assert started.wait(5)
+    assert running.state == uv_jobs.RUNNING and pending.state == uv_jobs.PENDING
+    runner.cancel_all(); release.set()
+    wait_delivered(runner)
+    assert running.state == uv_jobs.CANCELLED and pending.state == uv_jobs.CANCELLED
+    assert delivered == []
+
+def test_cancel_kills_process():
+    runner = uv_jobs.UVJobRunner(1)
+    command = [sys.executable, "-c", "import time; time.sleep(30)"]
+    job = runner.submit(uv_jobs.UVJob("a", lambda job: uv_jobs.run_process(job, command)))
+    while job.process is None: time.sleep(0.01)
+    start = time.monotonic()
+    job.cancel()
+    wait_delivered(runner)
+    assert job.state == uv_jobs.CANCELLED and time.monotonic() - start < 5
+
+# --- __UV_LINK z zaślepionym modułem c4d ---
+
+@pytest.fixture
+def uv_link(monkeypatch):
+    c4d = types.ModuleType("c4d")
+    c4d.gui = types.SimpleNamespace(GeDialog=object, MessageDialog=lambda text: None)
+    c4d.documents = types.SimpleNamespace()
+    c4d.GETACTIVEOBJECTFLAGS_CHILDREN, c4d.GETACTIVEOBJECTFLAGS_SELECTIONORDER = 1, 2
+    monkeypatch.setitem(sys.modules, "c4d", c4d)
+    monkeypatch.delitem(sys.modules, "__UV_LINK", raising=False)
+    monkeypatch.delitem(sys.modules, "uv_job_dialog", raising=False)
+    module = importlib.import_module("__UV_LINK")
+    yield module
+    sys.modules.pop("__UV_LINK", None); sys.modules.pop("uv_job_dialog", None)
+
+def test_apply_job_result(uv_link, monkeypatch):
+    applied = []
+    monkeypatch.setattr(uv_link, "apply_uvs_in_place", lambda doc, objects, path, duplicates, select: applied.append(objects) or objects)
+    job = uv_jobs.UVJob("a", None); job.result, job.state = 1, uv_jobs.DONE
+    uv_link.apply_job_result(None, job, ["obj"], "a.fbx", {})
+    assert job.state == uv_jobs.FAILED and "1" in job.error and applied == []
+    job.result, job.state = 0, uv_jobs.DONE
+    uv_link.apply_job_result(None, job, ["obj"], "a.fbx", {})
+    assert job.state == uv_jobs.DONE and applied == [["obj"]]
+
+def test_group_by_selected_ancestor(uv_link):
+    class Node:
+        def __init__(self, up=None): self.up = up
+        def GetUp(self): return self.up
+    root, other = Node(), Node()
+    child = Node(root); grandchild = Node(Node(child))
+    groups = uv_link.group_by_selected_ancestor([root, child, other, grandchild])
+    assert groups == [[root, child, grandchild], [other]]
+
+def test_single_mode_checks_exit_code(uv_link, monkeypatch, tmp_path):
+    obj = types.SimpleNamespace(GetName=lambda: "Cube")
+    doc = types.SimpleNamespace(GetActiveObjects=lambda flags: [obj])
+    uv_link.c4d.documents.GetActiveDocument = lambda: doc
+    monkeypatch.setattr(uv_link, "SETTINGS", {"EXPORT_PATH": str(tmp_path)})
+    monkeypatch.setattr(uv_link, "export_objects_to_fbx", lambda doc, objects, path: True)
+    monkeypatch.setattr(uv_link, "build_rizom_command", lambda *args, **kwargs: ["rizomuv"])
+    monkeypatch.setattr(uv_jobs, "run_process", lambda job, command: 3)
+    applied, runners = [], []
+    monkeypatch.setattr(uv_link, "apply_uvs_in_place", lambda *args: applied.append(args))
+    monkeypatch.setattr(uv_link.uv_job_dialog, "open_job_dialog", lambda runner, title, on_finished: runners.append(runner))
+    uv_link.run_exchange_process()
+    (job,) = wait_delivered(runners[0])
+    assert job.state == uv_jobs.FAILED and applied == []
+
+class FakeTag:
+    def __init__(self, count): self.count = count
+    def GetDataCount(self): return self.count
+
+class FakeMesh:
+    def __init__(self, name, polygons, uv_count, scene=None):
+        self.name, self.polygons, self.tag, self.scene = name, polygons, FakeTag(uv_count), scene
+    def IsAlive(self): return True
+    def IsInstanceOf(self, kind): return True
+    def GetName(self): return self.name
+    def SetName(self, name): self.name = name
+    def GetTag(self, kind): return self.tag
+    def GetPolygonCount(self): return self.polygons
+    def GetClone(self, flags): return FakeMesh(self.name, self.polygons, self.tag.count, self.scene)
+    def InsertAfter(self, obj): self.scene.append(self)
+
+def test_keep_original_skips_incompatible_uvs(uv_link, monkeypatch):
+    c4d = uv_link.c4d
+    for name in ("Tuvw", "Opolygon", "COPYFLAGS_NO_HIERARCHY", "UNDOTYPE_NEW", "UNDOTYPE_CHANGE", "SCENEFILTER_OBJECTS",
+                 "SELECTION_NEW", "SELECTION_ADD"):
+        setattr(c4d, name, 0)
+    c4d.EventAdd = lambda: None
+    c4d.documents.LoadDocument = lambda path, flags, thread: object()
+    c4d.documents.KillDocument = lambda doc: None
+    scene, undo = [], []
+    doc = types.SimpleNamespace(IsAlive=lambda: True, StartUndo=lambda: undo.append("start"), EndUndo=lambda: undo.append("end"),
+                                AddUndo=lambda kind, obj: None, SetActiveObject=lambda obj, mode: None)
+    obj = FakeMesh("Cube", 6, 24, scene)
+    # the returned mesh has the same polygons but a different UV count
+    monkeypatch.setattr(uv_link, "find_returned_meshes", lambda returned_doc: {uv_link.make_export_key(0): FakeMesh("RUV", 6, 30)})
+    monkeypatch.setattr(uv_link, "SETTINGS", {"KEEP_ORIGINAL": True, "SUFFIX": "_uv"})
+    assert uv_link.apply_uvs_in_place(doc, [obj], "a.fbx") == []
+    assert scene == [] and undo == ["start", "end"]
@@ -0,0 +1,43 @@
+import pytest
+
+import uv_templates
+from uv_templates import Template, TemplateError, check_brackets, compile_template
+
+def test_long_strings_and_comments_hide_brackets():
+    check_brackets('--[[ ZomPack({ ]]\nZomSet({Path="a]b"})\n')
+    check_brackets('local s = [==[ ) ]] } ]==]\n-- ( niedomknięty w komentarzu\n')
+    check_brackets("local s = 'a\\'(' .. \"}\"\n")
+    with pytest.raises(TemplateError, match="linia 3"):
+        check_brackets('--[[\n(\n]]ZomPack({)\n')
+    with pytest.raises(TemplateError, match="długi komentarz"):
+        check_brackets('--[=[ ]] ')
+    with pytest.raises(TemplateError, match="długi napis"):
+        check_brackets('x = [[ ')
+    with pytest.raises(TemplateError, match="niezamknięty napis"):
+        check_brackets('x = "abc\n"')
+
+def test_undeclared_parameter():
+    with pytest.raises(TemplateError, match=r"\$\{x\}"):
+        Template("ZomPack({Global={PaddingSize=${x}}})")
+
+def test_parameter_without_default():
+    with pytest.raises(TemplateError, match="brak wartości domyślnej"):
+        Template("-- @param padding: float\nZomPack({Global={PaddingSize=${padding}}})")
+
+def test_render():
+    template = Template("-- @param padding: float = 0.004\n-- @param rotate: bool = true\n"
+                        "ZomPack({Global={PaddingSize=${padding}}, Rotate={Enable=${rotate}}})")
+    script = template.render({"path": "C:\\exports\\a b.fbx", "rotate": "false"})
+    assert 'Path="C:/exports/a b.fbx"' in script
+    assert "PaddingSize=0.004" in script and "Enable=false" in script
+    assert script.startswith("ZomLoad(") and script.endswith("ZomQuit()\n")
+    with pytest.raises(TemplateError, match="nieznany parametr"):
+        template.render({"path": "a.fbx", "margin": 1})
+
+def test_cache_hit():
+    source = "-- @param steps: int = 3\nZomOptimize({Iterations=${steps}})"
+    uv_templates._CACHE.clear()
+    template = compile_template(source)
+    assert compile_template(source) is template
+    assert compile_template(source + "\n") is not template
+    assert len(uv_templates._CACHE) == 2
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Wykrywanie powtórzonych siatek (ta sama śruba, panel czy deska skopiowana wiele razy).
+
+Odcisk siatki łączy topologię (listę indeksów wielokątów) z geometrią opisaną
+niezależnie od transformacji: odległościami wierzchołków od środka ciężkości
+i długościami krawędzi, znormalizowanymi przez promień RMS siatki. Przesunięcie,
+obrót i skalowanie nie zmieniają więc odcisku, a siatki o tym samym odcisku mogą
+dzielić jedno rozwinięcie UV - kolejność wielokątów jest identyczna.
+
+Moduł nie importuje c4d - przyjmuje zwykłe listy punktów (x, y, z) i wielokątów (a, b, c, d).
+"""
+
+import hashlib
+import math
+from array import array
+
+# Względna precyzja porównania geometrii (po normalizacji rozmiaru siatki)
+DEFAULT_PRECISION = 1e-4
+
+def mesh_fingerprint(points, polygons, precision=DEFAULT_PRECISION):
+    """Zwraca odcisk siatki (hex) niezależny od przesunięcia, obrotu i skali."""
+    count = len(points)
+    digest = hashlib.sha1()
+    digest.update(array('q', [count, len(polygons)]).tobytes())
+    if count == 0: return digest.hexdigest()
+
+    cx = sum(p[0] for p in points) / count
+    cy = sum(p[1] for p in points) / count
+    cz = sum(p[2] for p in points) / count
+    radii = [math.sqrt((p[0] - cx) ** 2 + (p[1] - cy) ** 2 + (p[2] - cz) ** 2) for p in points]
+    rms = math.sqrt(sum(r * r for r in radii) / count) or 1.0
+    quantum = rms * precision
+
+    topology = array('q')
+    edges = array('q')
+    for polygon in polygons:
+        topology.extend(polygon)
+        # Wielokąt trójkątny w C4D ma c == d, wtedy ostatni bok jest zdegenerowany
+        for i in range(len(polygon)):
+            a, b = points[polygon[i]], points[polygon[(i + 1) % len(polygon)]]
+            edges.append(round(math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2) / quantum))
+
+    digest.update(topology.tobytes())
+    digest.update(array('q', [round(r / quantum) for r in radii]).tobytes())
+    digest.update(edges.tobytes())
+    return digest.hexdigest()
+
+def group_duplicates(fingerprints):
+    """Grupuje klucze o tym samym odcisku.
+
+    fingerprints - lista par (klucz, odcisk); odcisk None oznacza obiekt bez pary
+    Zwraca listę grup (list kluczy) w kolejności pierwszego wystąpienia - pierwszy
+    klucz grupy jest jej reprezentantem.
+    """
+    groups = {}
+    order = []
+    for key, fingerprint in fingerprints:
+        if fingerprint is None:
+            order.append([key]); continue
+        group = groups.get(fingerprint)
+        if group is None:
+            group = groups[fingerprint] = [key]; order.append(group)
+        else:
+            group.append(key)
+    return order
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Okno postępu dla zadań RizomUV uruchomionych w tle (zob. uv_jobs.py).
+
+Okno jest asynchroniczne, więc Cinema 4D pozostaje dostępne podczas rozwijania UV.
+Jego Timer wywołuje UVJobRunner.poll() w wątku głównym - tam wykonywany jest import
+wyników do sceny.
+"""
+
+import c4d
+
+import uv_jobs
+
+ID_TXT_JOB_STATUS = 4001
+ID_BTN_JOB_CANCEL = 4002
+
+TIMER_INTERVAL_MS = 100
+
+# Okna asynchroniczne muszą mieć żywą referencję, inaczej zniknie ono razem z modułem skryptu
+ACTIVE_DIALOGS = []
+
+class JobProgressDialog(c4d.gui.GeDialog):
+    def __init__(self, runner, title, on_finished=None):
+        self.runner = runner
+        self.title = title
+        self.on_finished = on_finished
+
+    def CreateLayout(self):
+        self.SetTitle(self.title); self.GroupBegin(0, c4d.BFH_SCALEFIT, 1, 0); self.GroupBorderSpace(10, 10, 10, 10)
+        self.AddStaticText(ID_TXT_JOB_STATUS, c4d.BFH_SCALEFIT, 300, 0, name="")
+        self.AddButton(ID_BTN_JOB_CANCEL, c4d.BFH_CENTER, name="Anuluj"); self.GroupEnd()
+        return True
+
+    def InitValues(self):
+        self.update_status(); self.SetTimer(TIMER_INTERVAL_MS)
+        return True
+
+    def Timer(self, msg):
+        for job in self.runner.poll():
+            if job.state == uv_jobs.FAILED: print(f"[BŁĄD] {job.name}: {job.error}")
+        self.update_status()
+        if self.runner.idle: self.finish()
+
+    def Command(self, id, msg):
+        if id == ID_BTN_JOB_CANCEL:
+            self.runner.cancel_all(); self.SetString(ID_TXT_JOB_STATUS, "Anulowanie...")
+        return True
+
+    def AskClose(self):
+        # Zamknięcie okna w trakcie pracy oznacza anulowanie - okno zamknie się samo po zatrzymaniu zadań
+        if self.runner.idle: return False
+        self.runner.cancel_all(); self.SetString(ID_TXT_JOB_STATUS, "Anulowanie...")
+        return True
+
+    def update_status(self):
+        done, total = self.runner.progress()
+        running = [job.name for job in self.runner.jobs if job.state == uv_jobs.RUNNING]
+        status = f"Zakończono {done} z {total}"
+        if running: status += f" | w toku: {', '.join(running[:3])}" + ("..." if len(running) > 3 else "")
+        self.SetString(ID_TXT_JOB_STATUS, status)
+        c4d.StatusSetBar(int(100 * done / total) if total else 0)
+
+    def finish(self):
+        self.SetTimer(0); c4d.StatusClear()
+        self.runner.shutdown()
+        if self in ACTIVE_DIALOGS: ACTIVE_DIALOGS.remove(self)
+        self.Close()
+        if self.on_finished is not None: self.on_finished(self.runner.jobs)
+
+def open_job_dialog(runner, title, on_finished=None):
+    dialog = JobProgressDialog(runner, title, on_finished)
+    ACTIVE_DIALOGS.append(dialog)
+    dialog.Open(c4d.DLG_TYPE_ASYNC, defaultw=350)
+    return dialog
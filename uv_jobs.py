@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Kolejka zadań RizomUV wykonywanych w tle.
+
+Zadanie (UVJob) uruchamia swoją funkcję roboczą w wątku tła, a jego callback
+on_done jest wywoływany dopiero w UVJobRunner.poll(), który host (np. Timer
+okna dialogowego w Cinema 4D) woła w wątku głównym. Dzięki temu operacje na
+scenie zawsze odbywają się w wątku głównym, a RizomUV nie blokuje interfejsu.
+
+Moduł nie importuje c4d, więc cykl życia zadań można sprawdzić bez Cinema 4D.
+"""
+
+import queue
+import subprocess
+import threading
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class JobCancelled(Exception):
+    pass
+
+class UVJob:
+    def __init__(self, name, work, on_done=None):
+        """
+        name    - nazwa widoczna w oknie postępu
+        work    - funkcja work(job) wykonywana w wątku tła, jej wynik trafia do job.result
+        on_done - funkcja on_done(job) wywoływana w wątku głównym po zakończeniu zadania
+        """
+        self.name = name
+        self.work = work
+        self.on_done = on_done
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.process = None
+        self.delivered = False
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set(): raise JobCancelled(self.name)
+
+    def attach_process(self, process):
+        """Wiąże proces z zadaniem, aby anulowanie mogło go zamknąć."""
+        with self._lock:
+            self.process = process
+            cancelled = self._cancel_event.is_set()
+        if cancelled: self._kill_process()
+
+    def cancel(self):
+        self._cancel_event.set()
+        self._kill_process()
+
+    def _kill_process(self):
+        with self._lock: process = self.process
+        if process is not None and process.poll() is None:
+            try: process.kill()
+            except OSError: pass
+
+def run_process(job, command):
+    """Uruchamia proces dla zadania i czeka na jego zakończenie. Zwraca kod wyjścia."""
+    job.check_cancelled()
+    job.attach_process(subprocess.Popen(command))
+    return_code = job.process.wait()
+    job.check_cancelled()
+    return return_code
+
+class UVJobRunner:
+    def __init__(self, max_workers=1):
+        self.max_workers = max(1, max_workers)
+        self.jobs = []
+        self._queue = queue.Queue()
+        self._finished = queue.Queue()
+        self._threads = []
+
+    def submit(self, job):
+        self.jobs.append(job)
+        self._queue.put(job)
+        if len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._worker, daemon=True)
+            self._threads.append(thread); thread.start()
+        return job
+
+    def shutdown(self):
+        for _ in self._threads: self._queue.put(None)
+        self._threads = []
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None: return
+            if job.cancel_requested:
+                job.state = CANCELLED
+            else:
+                job.state = RUNNING
+                try:
+                    job.result = job.work(job)
+                    job.state = CANCELLED if job.cancel_requested else DONE
+                except JobCancelled:
+                    job.state = CANCELLED
+                except Exception as e:
+                    job.error = e
+                    job.state = CANCELLED if job.cancel_requested else FAILED
+            self._finished.put(job)
+
+    def poll(self):
+        """Wywoływane w wątku głównym: uruchamia on_done zakończonych zadań i zwraca je."""
+        finished = []
+        while True:
+            try: job = self._finished.get_nowait()
+            except queue.Empty: break
+            job.delivered = True
+            if job.on_done is not None and job.state != CANCELLED: job.on_done(job)
+            finished.append(job)
+        return finished
+
+    def cancel_all(self):
+        for job in self.jobs: job.cancel()
+
+    def progress(self):
+        done = sum(1 for job in self.jobs if job.finished)
+        return done, len(self.jobs)
+
+    @property
+    def idle(self):
+        return all(job.delivered for job in self.jobs)
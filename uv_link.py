@@ -5,6 +5,9 @@ import os
 import subprocess
 import time
 
+import uv_jobs
+import uv_job_dialog
+
 # --- Import z biblioteki RizomUV Link ---
 # Upewnij się, że pliki RizomUVLinkBase.py oraz folder 'win' z rizomuvlink.pyd
 # znajdują się w folderze skryptów Cinema 4D.
@@ -20,6 +23,12 @@ except ImportError:
     # Zatrzymujemy skrypt, jeśli import się nie powiódł
     raise
 
+# Estymator ustawień pakowania wymaga numpy, bez niego używamy stałych wartości
+try:
+    import RizomUVPacking
+except ImportError:
+    RizomUVPacking = None
+
 # --- Stałe konfiguracyjne ---
 # Zaktualizowana ścieżka do programu RizomUV
 RIZOMUV_PATH = r"S:\_software\RizomUV\RizomUV 2024.1\rizomuv.exe"
@@ -30,6 +39,8 @@ CAMERA_TO_DELETE = "CINEMA_4D_Editor"
 FBX_EXPORTER_ID = 1026370
 # Port dla komunikacji z RizomUV Link
 RIZOMUV_PORT = 19730
+# Docelowa gęstość tekseli (piksele na jednostkę sceny), None = zawsze 2048px
+TARGET_TEXEL_DENSITY = None
 
 def main():
     """
@@ -72,7 +83,14 @@ def main():
 
     print("Eksport zakończony pomyślnie.")
 
-    # --- Krok 2: Uruchomienie RizomUV i automatyzacja przez RizomLink ---
+    # --- Krok 2: RizomUV pracuje w tle, a import (Krok 3 & 4) wraca do wątku głównego ---
+    runner = uv_jobs.UVJobRunner(1)
+    runner.submit(uv_jobs.UVJob(object_name, lambda job: unwrap_with_rizomuv(job, export_path),
+                                lambda job: import_result(doc, export_path)))
+    uv_job_dialog.open_job_dialog(runner, "RizomUV (auto)", lambda jobs: report_result(jobs[0], obj))
+
+def unwrap_with_rizomuv(job, export_path):
+    """Wykonywane w wątku tła - nie wolno tu dotykać sceny ani wyświetlać okien."""
     link = None
     process = None
     try:
@@ -80,6 +98,7 @@ def main():
         print(f"\nUruchamiam RizomUV w tle na porcie {RIZOMUV_PORT}...")
         command = [RIZOMUV_PATH, "-scriptingport", str(RIZOMUV_PORT)]
         process = subprocess.Popen(command)
+        job.attach_process(process)
 
         # Inicjalizacja połączenia
         link = CRizomUVLinkBase()
@@ -89,6 +108,7 @@ def main():
         timeout = 20  # Czekaj maksymalnie 10 sekund
         start_time = time.time()
         while not link.TCPPortIsOpen(RIZOMUV_PORT):
+            job.check_cancelled()
             time.sleep(0.5)
             if time.time() - start_time > timeout:
                 raise RuntimeError("Przekroczono limit czasu oczekiwania na RizomUV.")
@@ -104,11 +124,13 @@ def main():
         # 1. Załaduj plik
         print("1. Ładowanie pliku FBX...")
         link.Load({'File.Path': export_path})
+        job.check_cancelled()
 
         # 2. Rozwiń siatkę (Unfold)
         # Można dodać parametry, np. {'Iterations': 50} dla lepszej jakości
         print("2. Rozwijanie siatki (Unfold)...")
         link.Unfold({}) 
+        job.check_cancelled()
         
         # 3. Spakuj wyspy (Pack)
         # Ustawiamy podstawowe parametry pakowania.
@@ -126,7 +148,20 @@ def main():
                 'MarginSize': margin_px / map_res
             }
         }
-        print(f"3. Pakowanie wysp UV (Pack) z paddingiem {padding_px}px...")
+        # Rozdzielczość i padding dobrane z rozmiarów wysp po Unfold (przed Pack)
+        if RizomUVPacking is not None:
+            try:
+                result = link.Save({'Data': {}, 'IndexTable': {'PolygonIDsToIslandIDs': True}})
+                data = dict(result['Data'], **result['IndexTable'])
+                estimate = RizomUVPacking.EstimatePackSettings(data, TARGET_TEXEL_DENSITY)
+                pack_params = RizomUVPacking.PackParamsFromEstimate(estimate, pack_params)
+                map_res = float(estimate['MapResolution'])
+                padding_px = estimate['PaddingPixels']
+                print(f"   Szacunek: {estimate['MapResolution']}px, gęstość {estimate['TexelDensity']:.1f} px/j, "
+                      f"pokrycie {estimate['Coverage'] * 100.0:.0f}%")
+            except (CZEx, KeyError, ValueError) as e:
+                print(f"   Nie udało się oszacować ustawień pakowania ({e}), używam domyślnych.")
+        print(f"3. Pakowanie wysp UV (Pack) {int(map_res)}px z paddingiem {padding_px}px...")
         link.Pack(pack_params)
         
         # 4. Zapisz zmiany do tego samego pliku
@@ -135,14 +170,9 @@ def main():
 
         print("--- Operacje UV zakończone pomyślnie. ---")
 
-    except (CZEx, Exception) as e:
-        error_msg = f"Wystąpił błąd podczas komunikacji z RizomUV:\n\n{e}"
-        print(f"[KRYTYCZNY BŁĄD] {error_msg}")
-        c4d.gui.MessageDialog(error_msg)
-        return
     finally:
         # Zawsze próbuj zamknąć RizomUV, nawet jeśli wystąpił błąd
-        if link and link.TCPPortIsOpen(RIZOMUV_PORT):
+        if link and not job.cancel_requested and link.TCPPortIsOpen(RIZOMUV_PORT):
             print("Zamykam RizomUV...")
             try:
                 link.Quit({})
@@ -155,10 +185,22 @@ def main():
              if process.poll() is None:
                  print("Wymuszam zamknięcie procesu RizomUV.")
                  process.kill()
-        print(">>> RizomUV zamknięty. Wznawiam skrypt w C4D. <<<")
+        print(">>> RizomUV zamknięty. <<<")
 
+def report_result(job, obj):
+    if job.state == uv_jobs.DONE: return
+    obj.SetEditorMode(c4d.MODE_UNDEF)
+    obj.SetRenderMode(c4d.MODE_UNDEF)
+    c4d.EventAdd()
+    if job.state == uv_jobs.FAILED:
+        error_msg = f"Wystąpił błąd podczas komunikacji z RizomUV:\n\n{job.error}"
+        print(f"[KRYTYCZNY BŁĄD] {error_msg}")
+        c4d.gui.MessageDialog(error_msg)
+    else:
+        print("Przerwano przez użytkownika.")
 
-    # --- Krok 3 & 4: Import, czyszczenie i zmiana nazwy (bez zmian) ---
+def import_result(doc, export_path):
+    """Wykonywane w wątku głównym po zakończeniu pracy RizomUV."""
     print("\nImportuję plik z powrotem do sceny...")
     objects_before_merge = set(doc.GetObjects())
     c4d.documents.MergeDocument(doc, export_path, c4d.SCENEFILTER_OBJECTS | c4d.SCENEFILTER_MATERIALS)
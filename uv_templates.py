@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Szablony skryptów LUA dla RizomUV uruchamianych z parametrem -cfi.
+
+Skrypt deklaruje swoje parametry (z wartością domyślną) w komentarzach i używa
+ich jako ${nazwa}:
+
+    -- @param padding: float = 0.004
+    -- @param rotate: bool = true
+    ZomPack({Translate=true, Global={PaddingSize=${padding}}, Rotate={Enable=${rotate}}})
+
+Szablon jest sprawdzany i kompilowany raz (lista stałych fragmentów i nazw
+parametrów), a skompilowane szablony są trzymane w pamięci pod skrótem SHA1
+treści. Dla każdego obiektu zostaje tylko podstawienie parametrów i jedno
+"".join, więc koszt nie zależy od liczby obiektów ani długości skryptu.
+
+Szablon jest otaczany wczytaniem pliku (ZomLoad), cięciami z krawędzi C4D oraz
+zapisem i zamknięciem (ZomSave, ZomQuit), które korzystają z parametrów
+wbudowanych: path, import_uvs, seams i name.
+
+Moduł nie importuje c4d.
+"""
+
+import hashlib
+import re
+
+class TemplateError(Exception):
+    pass
+
+PARAM_PATTERN = re.compile(r'^\s*--\s*@param\s+(\w+)\s*:\s*(\w+)\s*(?:=\s*(.*?))?\s*$', re.MULTILINE)
+SLOT_PATTERN = re.compile(r'\$\{(\w*)\}')
+
+def lua_string(value):
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+def parse_bool(value):
+    if isinstance(value, str):
+        if value.strip().lower() not in ("true", "false"): raise ValueError(f"niepoprawna wartość logiczna: {value}")
+        return value.strip().lower() == "true"
+    return bool(value)
+
+def parse_string(value):
+    # Wartości domyślne w deklaracji mogą być w cudzysłowie
+    if isinstance(value, str) and len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return str(value)
+
+# Typ parametru: (zamiana wartości lub tekstu deklaracji, zapis jako kod LUA)
+PARAM_TYPES = {
+    "int": (int, str),
+    "float": (float, repr),
+    "bool": (parse_bool, lambda value: "true" if value else "false"),
+    "string": (parse_string, lua_string),
+    "path": (parse_string, lambda value: lua_string(value.replace("\\", "/"))),
+    # Gotowy kod LUA wstawiany bez zmian
+    "lua": (str, str),
+}
+
+BUILTIN_PARAMS = {
+    "path": ("path", None),
+    "import_uvs": ("bool", True),
+    "seams": ("lua", ""),
+    "name": ("string", ""),
+}
+
+PROLOGUE = 'ZomLoad({File={Path=${path}, ImportUVs=${import_uvs}}})\n${seams}'
+EPILOGUE = '\nZomSave({File={Path=${path}}})\nZomQuit()\n'
+
+# Długie nawiasy LUA: --[==[ komentarz ]==] i [==[ napis ]==] (dowolna liczba '=')
+LONG_BRACKET_PATTERN = re.compile(r'(--)?\[(=*)\[')
+
+def check_brackets(source):
+    """Sprawdza domknięcie nawiasów i napisów, pomijając komentarze i długie napisy (bez pełnego parsera LUA)."""
+    closing = {")": "(", "]": "[", "}": "{"}
+    stack = []
+    number = 1
+    i = 0
+    while i < len(source):
+        char = source[i]
+        long_bracket = LONG_BRACKET_PATTERN.match(source, i)
+        if long_bracket:
+            end = source.find("]" + long_bracket.group(2) + "]", long_bracket.end())
+            if end < 0:
+                kind = "komentarz" if long_bracket.group(1) else "napis"
+                raise TemplateError(f"linia {number}: niezamknięty długi {kind}")
+            end += len(long_bracket.group(2)) + 2
+            number += source.count("\n", i, end)
+            i = end; continue
+        if source.startswith("--", i):
+            end = source.find("\n", i)
+            i = len(source) if end < 0 else end; continue
+        if char in "\"'":
+            j = i + 1
+            while j < len(source) and source[j] != char:
+                if source[j] == "\n": break
+                j += 2 if source[j] == "\\" else 1
+            if j >= len(source) or source[j] != char: raise TemplateError(f"linia {number}: niezamknięty napis")
+            number += source.count("\n", i, j)
+            i = j + 1; continue
+        if char == "\n": number += 1
+        elif char in "([{": stack.append((char, number))
+        elif char in closing:
+            if not stack or stack[-1][0] != closing[char]:
+                raise TemplateError(f"linia {number}: niedopasowany nawias '{char}'")
+            stack.pop()
+        i += 1
+    if stack: raise TemplateError(f"linia {stack[-1][1]}: niezamknięty nawias '{stack[-1][0]}'")
+
+class Template:
+    def __init__(self, source):
+        """Sprawdza i kompiluje szablon; błędy zgłasza jako TemplateError."""
+        self.source = source
+        self.params = dict(BUILTIN_PARAMS)
+        for name, type_name, default in PARAM_PATTERN.findall(source):
+            if name in self.params: raise TemplateError(f"parametr '{name}' zadeklarowany ponownie lub zastrzeżony")
+            if type_name not in PARAM_TYPES: raise TemplateError(f"parametr '{name}': nieznany typ '{type_name}'")
+            # Wartości są podstawiane tylko z deklaracji, więc każdy parametr musi mieć domyślną
+            if not default: raise TemplateError(f"parametr '{name}': brak wartości domyślnej")
+            try: self.params[name] = (type_name, PARAM_TYPES[type_name][0](default))
+            except ValueError as e: raise TemplateError(f"parametr '{name}': {e}")
+        check_brackets(source)
+
+        # Stałe fragmenty i nazwy parametrów na przemian: literals[0], slots[0], literals[1]...
+        pieces = SLOT_PATTERN.split(PROLOGUE + source + EPILOGUE)
+        self.literals, self.slots = pieces[0::2], pieces[1::2]
+        for name in self.slots:
+            if name not in self.params: raise TemplateError(f"użyty niezadeklarowany parametr '${{{name}}}'")
+
+    def render(self, values=None):
+        """Zwraca gotowy skrypt LUA; brakujące wartości są brane z deklaracji."""
+        values = values or {}
+        for name in values:
+            if name not in self.params: raise TemplateError(f"nieznany parametr '{name}'")
+        texts = {}
+        for name, (type_name, default) in self.params.items():
+            value = values.get(name, default)
+            if value is None: raise TemplateError(f"brak wartości parametru '{name}'")
+            convert, write = PARAM_TYPES[type_name]
+            try: texts[name] = write(convert(value))
+            except ValueError as e: raise TemplateError(f"parametr '{name}': {e}")
+        parts = [None] * (len(self.literals) + len(self.slots))
+        parts[0::2] = self.literals
+        parts[1::2] = [texts[name] for name in self.slots]
+        return "".join(parts)
+
+_CACHE = {}
+
+def compile_template(source):
+    """Zwraca skompilowany szablon, z pamięci podręcznej jeśli treść już była kompilowana."""
+    key = hashlib.sha1(source.encode("utf-8")).hexdigest()
+    template = _CACHE.get(key)
+    if template is None:
+        template = _CACHE[key] = Template(source)
+    return template